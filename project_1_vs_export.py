@@ -0,0 +1,240 @@
+import gzip
+import io
+import os
+import time
+import uuid
+
+import pandas as pd
+
+
+# --- Streaming Export of Query Results ---
+# Query results are written to disk chunk by chunk straight from the cursor, so
+# an export of any size only ever holds EXPORT_CHUNK_ROWS rows in memory.
+# Files go to Streamlit's static folder and are downloaded from there
+# (needs `enableStaticServing = true`, see .streamlit/config.toml), so the
+# finished file is streamed from disk instead of being loaded into the app.
+#
+# Streamlit's static file serving refuses files larger than 200 MB, so large
+# exports are split into parts of at most EXPORT_MAX_PART_BYTES; every part is
+# a complete file (CSV parts repeat the header). Unknown extensions are served
+# as text/plain, so the links use the `download` attribute to save the bytes
+# as-is under the file name.
+
+EXPORT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "exports")
+EXPORT_URL_PATH = "app/static/exports" # URL under which Streamlit serves EXPORT_DIR
+EXPORT_CHUNK_ROWS = 50000 # Rows fetched from the cursor and written per chunk
+EXPORT_MAX_AGE_SECONDS = 3600 # Older export files are deleted on the next export
+STATIC_SERVING_MAX_BYTES = 200 * 1024 * 1024 # Streamlit does not serve larger static files
+EXPORT_MAX_PART_BYTES = 180 * 1024 * 1024 # Start a new part past this size (headroom for the last chunk)
+
+EXPORT_FORMATS = {
+    "csv": ".csv.gz",
+    "parquet": ".parquet",
+}
+
+
+class ExportTooLargeError(Exception):
+    """An export part ended up larger than Streamlit can serve."""
+
+
+def iter_cursor_chunks(cursor, chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+    Yields the result of an executed `cursor` as DataFrames of at most
+    `chunk_rows` rows. Use an unbuffered cursor on a dedicated connection:
+    rows are fetched with `fetchmany`, so they stay on the server until needed.
+    """
+    columns = [column[0] for column in cursor.description]
+    while True:
+        rows = cursor.fetchmany(chunk_rows)
+        if not rows:
+            break
+        # coerce_float turns MySQL DECIMAL results (AVG, SUM) into floats, like pd.read_sql_query
+        yield pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
+
+
+def write_csv_export(chunks, part_path, max_part_bytes=EXPORT_MAX_PART_BYTES):
+    """
+    Writes the chunks to gzip-compressed CSV files, starting a new part (with
+    its own header) once the current one reaches `max_part_bytes`.
+    `part_path(n)` gives the path of part n. Returns (paths, row_count).
+    """
+    paths = []
+    row_count = 0
+    raw_file = text_file = None
+    try:
+        for chunk in chunks:
+            if text_file is None or raw_file.tell() >= max_part_bytes:
+                if text_file is not None:
+                    text_file.close()
+                paths.append(part_path(len(paths) + 1))
+                raw_file = open(paths[-1], "wb")
+                text_file = io.TextIOWrapper(gzip.GzipFile(fileobj=raw_file, mode="wb"), newline="", encoding="utf-8")
+                header = True
+            chunk.to_csv(text_file, header=header, index=False)
+            header = False
+            # Push the chunk through the compressor so raw_file.tell() tracks the part size
+            text_file.flush()
+            row_count += len(chunk)
+    finally:
+        if text_file is not None:
+            text_file.close()
+        if raw_file is not None:
+            raw_file.close()
+    return paths, row_count
+
+
+def write_parquet_export(chunks, part_path, max_part_bytes=EXPORT_MAX_PART_BYTES, column_types=None):
+    """
+    Writes the chunks to Parquet files, one row group per chunk, starting a new
+    part once the current one reaches `max_part_bytes`. `part_path(n)` gives
+    the path of part n. `column_types` (see parquet_column_types) fixes the type
+    of each column. Returns (paths, row_count). Needs pyarrow (pip install pyarrow).
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    paths = []
+    row_count = 0
+    schema = None
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if schema is None:
+                schema = _parquet_schema(table, column_types)
+            if writer is None or os.path.getsize(paths[-1]) >= max_part_bytes:
+                if writer is not None:
+                    writer.close()
+                paths.append(part_path(len(paths) + 1))
+                writer = pq.ParquetWriter(paths[-1], schema, compression="snappy")
+            # Every chunk is cast to the schema of the first one, so inferred types can't drift
+            writer.write_table(table.cast(schema))
+            row_count += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return paths, row_count
+
+
+def parquet_column_types(description):
+    """
+    Parquet type of each result column, from the MySQL column types reported in
+    `cursor.description`, so a column's type doesn't depend on its values in
+    the first chunk. None where the cursor reports no type (e.g. sqlite3) or
+    the type can hold text or bytes (TEXT/BLOB); those are taken from the first chunk.
+    """
+    import pyarrow as pa
+    from mysql.connector import FieldType
+
+    types = {}
+    for type_code in (FieldType.TINY, FieldType.SHORT, FieldType.INT24, FieldType.LONG,
+                      FieldType.LONGLONG, FieldType.YEAR, FieldType.BIT):
+        types[type_code] = pa.int64()
+    for type_code in (FieldType.FLOAT, FieldType.DOUBLE, FieldType.DECIMAL, FieldType.NEWDECIMAL):
+        types[type_code] = pa.float64()
+    for type_code in (FieldType.DATE, FieldType.NEWDATE):
+        types[type_code] = pa.date32()
+    for type_code in (FieldType.DATETIME, FieldType.TIMESTAMP):
+        types[type_code] = pa.timestamp("us")
+    types[FieldType.TIME] = pa.duration("us")
+    for type_code in (FieldType.VARCHAR, FieldType.VAR_STRING, FieldType.STRING, FieldType.ENUM,
+                      FieldType.SET, FieldType.JSON, FieldType.NULL):
+        types[type_code] = pa.string()
+    return [types.get(column[1]) for column in description]
+
+
+def _parquet_schema(table, column_types=None):
+    """
+    File schema: the given `column_types`, and for columns without one the type
+    of the first chunk, with DECIMAL results as float64 and all-NULL columns as strings.
+    """
+    import pyarrow as pa
+
+    fields = []
+    for i, field in enumerate(table.schema):
+        if column_types is not None and column_types[i] is not None:
+            field = field.with_type(column_types[i])
+        elif pa.types.is_null(field.type):
+            field = field.with_type(pa.string())
+        elif pa.types.is_decimal(field.type):
+            field = field.with_type(pa.float64())
+        fields.append(field)
+    return pa.schema(fields)
+
+
+def export_query(connection, query, export_format, name_prefix="export", chunk_rows=EXPORT_CHUNK_ROWS,
+                 max_part_bytes=EXPORT_MAX_PART_BYTES):
+    """
+    Streams the result of `query` into new file(s) in EXPORT_DIR.
+    Returns (file_names, row_count); each file is served at EXPORT_URL_PATH/file_name.
+    A single-part export has no part suffix in its name. Raises
+    ExportTooLargeError if a part is still too large for Streamlit to serve.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {export_format}")
+
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    remove_old_exports()
+
+    base_name = f"{name_prefix}_{time.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+    extension = EXPORT_FORMATS[export_format]
+
+    def part_path(part_number):
+        return os.path.join(EXPORT_DIR, f"{base_name}_part{part_number:03d}{extension}")
+
+    cursor = connection.cursor()
+    paths = []
+    try:
+        cursor.execute(query.strip().rstrip(";"))
+        chunks = iter_cursor_chunks(cursor, chunk_rows)
+        if export_format == "csv":
+            paths, row_count = write_csv_export(chunks, part_path, max_part_bytes)
+        else:
+            column_types = parquet_column_types(cursor.description)
+            paths, row_count = write_parquet_export(chunks, part_path, max_part_bytes, column_types)
+        # Only once every row was read: an unbuffered cursor with unread rows can't be
+        # closed, so after a failure it goes away with the (dedicated) connection
+        cursor.close()
+
+        if not paths:
+            # No rows: still hand out a (header-less) empty file
+            paths = [part_path(1)]
+            open(paths[0], "wb").close()
+
+        for path in paths:
+            if os.path.getsize(path) > STATIC_SERVING_MAX_BYTES:
+                raise ExportTooLargeError(
+                    f"{os.path.basename(path)} is {os.path.getsize(path) / 1024 ** 2:.0f} MB, "
+                    f"over the {STATIC_SERVING_MAX_BYTES // 1024 ** 2} MB Streamlit can serve. Use a smaller chunk size."
+                )
+
+        if len(paths) == 1:
+            single_path = os.path.join(EXPORT_DIR, f"{base_name}{extension}")
+            os.replace(paths[0], single_path)
+            paths = [single_path]
+    except BaseException:
+        # Don't leave half-written or unservable files behind
+        for path in paths or _written_parts(part_path):
+            if os.path.exists(path):
+                os.remove(path)
+        raise
+    return [os.path.basename(path) for path in paths], row_count
+
+
+def _written_parts(part_path):
+    """Paths of the parts written so far (used for cleanup when the writer failed midway)."""
+    part_number = 1
+    while os.path.exists(part_path(part_number)):
+        yield part_path(part_number)
+        part_number += 1
+
+
+def remove_old_exports(max_age_seconds=EXPORT_MAX_AGE_SECONDS):
+    """Deletes export files older than `max_age_seconds`."""
+    if not os.path.isdir(EXPORT_DIR):
+        return
+    cutoff = time.time() - max_age_seconds
+    for file_name in os.listdir(EXPORT_DIR):
+        path = os.path.join(EXPORT_DIR, file_name)
+        if os.path.isfile(path) and os.path.getmtime(path) < cutoff:
+            os.remove(path)
@@ -0,0 +1,562 @@
+import argparse
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+import mysql.connector
+import requests
+
+from project_1_vs_physics import add_derived_columns, backfill_derived_columns
+
+
+# --- Scheduled NeoWs Ingestion Daemon ---
+# Long-running replacement for the ingestion notebook:
+#   * the date range to ingest is split into feed windows (the NeoWs feed returns
+#     at most 7 days per request) kept in a persistent SQLite work queue;
+#   * N worker threads claim windows, fetch them, and load them into MySQL
+#     (asteroids, close_approach and the close_approach_daily cube);
+#   * failed windows are retried with jittered exponential backoff, and moved to
+#     the 'dead' state after MAX_ATTEMPTS;
+#   * a window is marked 'done' only after its MySQL transaction commits, and
+#     windows left 'running' by a crash are re-queued on start, so a restart
+#     resumes where the last run stopped.
+# Run it with:  python project_1_vs_ingest_daemon.py --start-date 2024-01-01 --workers 4
+# Point --base-url at a local fake NeoWs server to run it without the real API.
+
+# --- MySQL Database Connection Details ---
+DB_HOST = "localhost"
+DB_USER = "vikram"
+DB_PASSWORD = "Vikram"
+DB_NAME = "project_1"
+
+# --- NeoWs API ---
+NEOWS_BASE_URL = "https://api.nasa.gov/neo/rest/v1"
+API_KEY = os.environ.get("NASA_API_KEY", "DEMO_KEY") # get the api key from https://api.nasa.gov
+FEED_WINDOW_DAYS = 7 # The feed endpoint accepts at most 7 days per request
+REQUEST_TIMEOUT_SECONDS = 30
+RATE_LIMIT_PER_HOUR = 1000 # Default hourly limit of a personal api.nasa.gov key
+
+# --- Work Queue ---
+QUEUE_PATH = "ingest_queue.sqlite3"
+MAX_ATTEMPTS = 5 # Attempts before a window is moved to the 'dead' state
+BACKOFF_BASE_SECONDS = 5.0
+BACKOFF_MAX_SECONDS = 600.0
+IDLE_SLEEP_SECONDS = 1.0 # How long an idle worker waits before asking the queue again
+POLL_INTERVAL_SECONDS = 3600 # How often the scheduler queues newly available days
+LOCK_RETRIES = 5 # Immediate retries of a window transaction hit by a deadlock or lock wait timeout
+LOCK_ERRNOS = (1213, 1205) # ER_LOCK_DEADLOCK, ER_LOCK_WAIT_TIMEOUT
+# Window transactions run at READ COMMITTED: the range DELETEs take no gap locks
+# (so adjacent windows don't block each other) and the INSERT ... SELECT into the
+# cube reads close_approach/asteroids without locking them. With binary logging
+# this needs binlog_format=ROW (the MySQL 8 default).
+LOAD_ISOLATION_LEVEL = "READ COMMITTED"
+
+logger = logging.getLogger("neo_ingest")
+
+
+# --- SQL for the Load Step ---
+# Same tables as the ingestion notebook.
+SCHEMA_QUERIES = [
+    'create table if not exists asteroids (id int primary key, name varchar(150), absolute_magnitude_h float(5,2), estimated_diameter_min_km float(21,20), estimated_diameter_max_km float(21,20), is_potentially_hazardous_asteroid boolean)',
+    'create table if not exists close_approach (neo_reference_id int, close_approach_date date, relative_velocity_kmph float(10,10), astronomical float(10,10), miss_distance_km float(10,10), miss_distance_lunar float(10,10), orbiting_body varchar(50))',
+    'create table if not exists close_approach_daily (approach_day date not null, is_potentially_hazardous_asteroid boolean not null, velocity_bucket smallint not null, orbiting_body varchar(50) not null, approach_count int not null, min_astronomical double, max_velocity_kmph double, primary key (approach_day, is_potentially_hazardous_asteroid, velocity_bucket, orbiting_body))',
+]
+INDEX_QUERIES = [
+    'create index idx_close_approach_date on close_approach (close_approach_date)',
+    'create index idx_close_approach_au_date on close_approach (astronomical, close_approach_date)',
+    'create index idx_close_approach_lunar_date on close_approach (miss_distance_lunar, close_approach_date)',
+    'create index idx_close_approach_neo_au on close_approach (neo_reference_id, astronomical)',
+    'create index idx_close_approach_risk on close_approach (approach_risk_score)',
+]
+# Derived columns (see project_1_vs_physics.py), added to tables created before they existed
+DERIVED_COLUMN_QUERIES = [
+    'alter table close_approach add column estimated_diameter_mean_km double',
+    'alter table close_approach add column velocity_kms double',
+    'alter table close_approach add column kinetic_energy_mt double',
+    'alter table close_approach add column approach_risk_score double',
+]
+
+# Tables created by older runs of the notebook have no key on asteroids.id and may hold the same
+# asteroid many times. ensure_schema keeps one row per id and adds the primary key.
+ASTEROID_KEY_CHECK_QUERY = '''
+SELECT COUNT(*) FROM information_schema.statistics
+WHERE table_schema = DATABASE() AND table_name = 'asteroids' AND column_name = 'id' AND non_unique = 0
+'''
+ASTEROID_DEDUP_QUERIES = [
+    'drop table if exists asteroids_dedup',
+    'create table asteroids_dedup like asteroids',
+    'alter table asteroids_dedup modify id int not null, add primary key (id)',
+    '''INSERT INTO asteroids_dedup (id, name, absolute_magnitude_h, estimated_diameter_min_km, estimated_diameter_max_km, is_potentially_hazardous_asteroid)
+       SELECT id, name, absolute_magnitude_h, estimated_diameter_min_km, estimated_diameter_max_km, is_potentially_hazardous_asteroid
+       FROM (SELECT *, ROW_NUMBER() OVER (PARTITION BY id) AS row_in_id FROM asteroids WHERE id IS NOT NULL) AS numbered
+       WHERE row_in_id = 1''',
+    'rename table asteroids to asteroids_with_duplicates, asteroids_dedup to asteroids',
+    'drop table asteroids_with_duplicates',
+]
+
+# Asteroids are inserted once per id (the feed repeats them in every window they
+# approach in). The primary key makes this a single index lookup per row.
+ASTEROID_INSERT_QUERY = 'INSERT IGNORE INTO asteroids (id, name, absolute_magnitude_h, estimated_diameter_min_km, estimated_diameter_max_km, is_potentially_hazardous_asteroid) VALUES (%s, %s, %s, %s, %s, %s)'
+APPROACH_DELETE_QUERY = 'DELETE FROM close_approach WHERE close_approach_date BETWEEN %s AND %s'
+APPROACH_INSERT_QUERY = 'INSERT INTO close_approach (neo_reference_id, close_approach_date, relative_velocity_kmph, astronomical, miss_distance_km, miss_distance_lunar, orbiting_body, estimated_diameter_mean_km, velocity_kms, kinetic_energy_mt, approach_risk_score) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)'
+CUBE_DELETE_QUERY = 'DELETE FROM close_approach_daily WHERE approach_day BETWEEN %s AND %s'
+# asteroids is keyed on id (see ensure_schema), so the join is one key lookup per
+# approach of the window instead of a scan of the whole table. It is an inner join,
+# like the raw time-series queries of the dashboard, so both count the same approaches.
+CUBE_INSERT_QUERY = '''
+INSERT INTO close_approach_daily (approach_day, is_potentially_hazardous_asteroid, velocity_bucket, orbiting_body, approach_count, min_astronomical, max_velocity_kmph)
+SELECT ca.close_approach_date, COALESCE(a.is_potentially_hazardous_asteroid, FALSE), FLOOR(ca.relative_velocity_kmph / 1000), COALESCE(ca.orbiting_body, ''),
+       COUNT(ca.neo_reference_id), MIN(ca.astronomical), MAX(ca.relative_velocity_kmph)
+FROM close_approach AS ca
+JOIN asteroids AS a ON a.id = ca.neo_reference_id
+WHERE ca.close_approach_date BETWEEN %s AND %s
+GROUP BY 1, 2, 3, 4
+'''
+# One-time fill of an empty cube from everything already in close_approach
+CUBE_BACKFILL_QUERY = '''
+INSERT INTO close_approach_daily (approach_day, is_potentially_hazardous_asteroid, velocity_bucket, orbiting_body, approach_count, min_astronomical, max_velocity_kmph)
+SELECT ca.close_approach_date, COALESCE(a.is_potentially_hazardous_asteroid, FALSE), FLOOR(ca.relative_velocity_kmph / 1000), COALESCE(ca.orbiting_body, ''),
+       COUNT(ca.neo_reference_id), MIN(ca.astronomical), MAX(ca.relative_velocity_kmph)
+FROM close_approach AS ca
+JOIN asteroids AS a ON a.id = ca.neo_reference_id
+WHERE ca.close_approach_date IS NOT NULL
+GROUP BY 1, 2, 3, 4
+'''
+
+
+class FeedWindowQueue:
+    """
+    Persistent queue of feed windows, stored in SQLite.
+
+    Each window (start_date, end_date) is 'pending', 'running', 'done' or
+    'dead'. Pending windows become claimable once `next_attempt_at` has passed.
+    """
+
+    def __init__(self, path=QUEUE_PATH):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._lock, self._db:
+            self._db.execute("""
+                create table if not exists feed_windows (
+                    start_date text primary key,
+                    end_date text not null,
+                    status text not null default 'pending',
+                    attempts integer not null default 0,
+                    next_attempt_at real not null default 0,
+                    last_error text,
+                    updated_at real
+                )
+            """)
+
+    def close(self):
+        self._db.close()
+
+    def enqueue_range(self, start_date, end_date, window_days=FEED_WINDOW_DAYS):
+        """
+        Queues the windows covering [start_date, end_date]. Windows are aligned on
+        start_date, so re-queuing the same range is a no-op; a window that grew
+        (its last run ended before today) is queued again to pick up the new days.
+        """
+        windows = []
+        window_start = start_date
+        while window_start <= end_date:
+            window_end = min(window_start + timedelta(days=window_days - 1), end_date)
+            windows.append((window_start.isoformat(), window_end.isoformat(), time.time()))
+            window_start = window_end + timedelta(days=1)
+
+        with self._lock, self._db:
+            self._db.executemany("""
+                insert into feed_windows (start_date, end_date, updated_at) values (?, ?, ?)
+                on conflict (start_date) do update set
+                    end_date = excluded.end_date, status = 'pending', attempts = 0,
+                    next_attempt_at = 0, last_error = null, updated_at = excluded.updated_at
+                where feed_windows.end_date < excluded.end_date and feed_windows.status != 'running'
+            """, windows)
+        return len(windows)
+
+    def recover(self):
+        """Re-queues windows left 'running' by a previous run that crashed. Returns how many."""
+        with self._lock, self._db:
+            cursor = self._db.execute(
+                "update feed_windows set status = 'pending', updated_at = ? where status = 'running'",
+                (time.time(),)
+            )
+        return cursor.rowcount
+
+    def claim(self):
+        """Marks the oldest due pending window as 'running' and returns (start_date, end_date, attempts), or None."""
+        with self._lock, self._db:
+            row = self._db.execute("""
+                select start_date, end_date, attempts from feed_windows
+                where status = 'pending' and next_attempt_at <= ?
+                order by start_date limit 1
+            """, (time.time(),)).fetchone()
+            if row is None:
+                return None
+            self._db.execute(
+                "update feed_windows set status = 'running', updated_at = ? where start_date = ?",
+                (time.time(), row[0])
+            )
+        return date.fromisoformat(row[0]), date.fromisoformat(row[1]), row[2]
+
+    def mark_done(self, start_date):
+        with self._lock, self._db:
+            self._db.execute(
+                "update feed_windows set status = 'done', last_error = null, updated_at = ? where start_date = ?",
+                (time.time(), start_date.isoformat())
+            )
+
+    def mark_failed(self, start_date, error, max_attempts=MAX_ATTEMPTS, min_delay=0.0):
+        """
+        Records a failed attempt. The window is retried after a jittered
+        exponential backoff (at least `min_delay` seconds), or moved to 'dead'
+        once it has failed `max_attempts` times. Returns the new status.
+        """
+        with self._lock, self._db:
+            attempts = self._db.execute(
+                "select attempts from feed_windows where start_date = ?", (start_date.isoformat(),)
+            ).fetchone()[0] + 1
+            if attempts >= max_attempts:
+                status, next_attempt_at = "dead", 0
+            else:
+                # "Full jitter": a random delay up to the exponential backoff, so workers don't retry in lockstep
+                backoff = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** (attempts - 1))
+                status, next_attempt_at = "pending", time.time() + max(min_delay, random.uniform(0, backoff))
+            self._db.execute("""
+                update feed_windows set status = ?, attempts = ?, next_attempt_at = ?, last_error = ?, updated_at = ?
+                where start_date = ?
+            """, (status, attempts, next_attempt_at, str(error)[:1000], time.time(), start_date.isoformat()))
+        return status
+
+    def is_drained(self):
+        """True when no window is pending or running (everything is done or dead)."""
+        with self._lock:
+            row = self._db.execute(
+                "select count(*) from feed_windows where status in ('pending', 'running')"
+            ).fetchone()
+        return row[0] == 0
+
+    def status_counts(self):
+        with self._lock:
+            rows = self._db.execute("select status, count(*) from feed_windows group by status").fetchall()
+        return dict(rows)
+
+
+class RateLimiter:
+    """Spaces out requests so that all workers together stay under `per_hour` requests."""
+
+    def __init__(self, per_hour=RATE_LIMIT_PER_HOUR):
+        self.interval = 3600.0 / per_hour if per_hour else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        time.sleep(max(0.0, slot - now))
+
+
+class FeedRequestError(Exception):
+    """A feed request failed; `retry_after` is the server's requested wait in seconds (if any)."""
+
+    def __init__(self, message, retry_after=0.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def fetch_feed_window(session, start_date, end_date, base_url=NEOWS_BASE_URL, api_key=API_KEY):
+    """Fetches one window from the NeoWs feed endpoint and returns the decoded JSON."""
+    try:
+        response = session.get(
+            f"{base_url}/feed",
+            params={"start_date": start_date.isoformat(), "end_date": end_date.isoformat(), "api_key": api_key},
+            timeout=REQUEST_TIMEOUT_SECONDS
+        )
+    except requests.RequestException as err:
+        raise FeedRequestError(f"Request failed: {err}")
+
+    if response.status_code != 200:
+        retry_after = 0.0
+        if response.status_code == 429:
+            try:
+                retry_after = float(response.headers.get("Retry-After", 0))
+            except ValueError:
+                pass
+        raise FeedRequestError(f"HTTP {response.status_code}: {response.text[:200]}", retry_after)
+
+    try:
+        return response.json()
+    except ValueError as err:
+        raise FeedRequestError(f"Invalid JSON in feed response: {err}")
+
+
+def transform_feed(data):
+    """
+    Flattens a feed response into one record per close approach, with the same
+    fields the ingestion notebook stores in `asteroids_data`, plus the derived
+    physics columns (see project_1_vs_physics.add_derived_columns).
+    """
+    records = []
+    for asteroid_details in data['near_earth_objects'].values():
+        for ast in asteroid_details:
+            for approach in ast['close_approach_data']:
+                records.append(dict(
+                    id = int(ast['id']),
+                    neo_reference_id = int(ast['neo_reference_id']),
+                    name = ast['name'],
+                    absolute_magnitude_h = ast['absolute_magnitude_h'],
+                    estimated_diameter_min_km = ast['estimated_diameter']['kilometers']['estimated_diameter_min'],
+                    estimated_diameter_max_km = ast['estimated_diameter']['kilometers']['estimated_diameter_max'],
+                    is_potentially_hazardous_asteroid = ast['is_potentially_hazardous_asteroid'],
+                    close_approach_date = datetime.strptime(approach['close_approach_date'], '%Y-%m-%d'),
+                    relative_velocity_kmph = float(approach['relative_velocity']['kilometers_per_hour']),
+                    astronomical = float(approach['miss_distance']['astronomical']),
+                    miss_distance_km = float(approach['miss_distance']['kilometers']),
+                    miss_distance_lunar = float(approach['miss_distance']['lunar']),
+                    orbiting_body = approach['orbiting_body']
+                ))
+    return add_derived_columns(records)
+
+
+class MySQLWindowLoader:
+    """Loads transformed windows into MySQL, one connection per worker thread."""
+
+    def __init__(self, host=DB_HOST, user=DB_USER, password=DB_PASSWORD, database=DB_NAME):
+        self._connect_args = dict(host=host, user=user, password=password, database=database)
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or not conn.is_connected():
+            conn = mysql.connector.connect(**self._connect_args)
+            cursor = conn.cursor()
+            cursor.execute(f"SET SESSION TRANSACTION ISOLATION LEVEL {LOAD_ISOLATION_LEVEL}")
+            cursor.close()
+            self._local.conn = conn
+        return conn
+
+    def ensure_schema(self):
+        """
+        Creates the tables and indexes if they don't exist yet, backfills the cube
+        when it is empty and the derived physics columns of rows loaded before
+        they existed (so history is counted and ranked too).
+        """
+        conn = self._connection()
+        cursor = conn.cursor()
+        try:
+            for query in SCHEMA_QUERIES:
+                cursor.execute(query)
+            cursor.execute(ASTEROID_KEY_CHECK_QUERY)
+            if cursor.fetchone()[0] == 0:
+                logger.info("Removing duplicate asteroids and adding a primary key on asteroids.id")
+                for query in ASTEROID_DEDUP_QUERIES:
+                    cursor.execute(query)
+            for query in DERIVED_COLUMN_QUERIES:
+                try:
+                    cursor.execute(query)
+                except mysql.connector.Error as err:
+                    # 1060 = the column already exists
+                    if err.errno != 1060:
+                        raise
+            for query in INDEX_QUERIES:
+                try:
+                    cursor.execute(query)
+                except mysql.connector.Error as err:
+                    # 1061 = the index already exists
+                    if err.errno != 1061:
+                        raise
+            conn.commit()
+
+            cursor.execute('select count(*) from close_approach_daily')
+            if cursor.fetchone()[0] == 0:
+                cursor.execute(CUBE_BACKFILL_QUERY)
+                conn.commit()
+                logger.info("close_approach_daily backfilled with %d rows", cursor.rowcount)
+
+            backfilled = backfill_derived_columns(conn)
+            if backfilled:
+                logger.info("Derived physics columns backfilled for %d approaches", backfilled)
+        finally:
+            cursor.close()
+
+    def load_window(self, start_date, end_date, records):
+        """
+        Replaces the window's approaches and cube rows in one transaction, so a
+        window that is loaded again (retry, or resume after a crash) is not duplicated.
+        Concurrent windows only lock the rows they write (see LOAD_ISOLATION_LEVEL);
+        a transaction that still loses a deadlock or times out waiting for a lock
+        (e.g. on an asteroid another worker is inserting) is retried right away
+        (up to LOCK_RETRIES times) instead of failing the window.
+        """
+        for lock_retry in range(LOCK_RETRIES + 1):
+            try:
+                self._load_window_once(start_date, end_date, records)
+                return
+            except mysql.connector.Error as err:
+                if err.errno not in LOCK_ERRNOS or lock_retry == LOCK_RETRIES:
+                    raise
+                logger.info("Window %s..%s hit MySQL error %d, retrying the transaction", start_date, end_date, err.errno)
+
+    def _load_window_once(self, start_date, end_date, records):
+        conn = self._connection()
+        cursor = conn.cursor()
+        try:
+            # Sorted by id so concurrent workers lock asteroid rows in the same order
+            cursor.executemany(ASTEROID_INSERT_QUERY, [
+                (d['id'], d['name'], d['absolute_magnitude_h'], d['estimated_diameter_min_km'], d['estimated_diameter_max_km'], d['is_potentially_hazardous_asteroid'])
+                for _, d in sorted({d['id']: d for d in records}.items())
+            ])
+            cursor.execute(APPROACH_DELETE_QUERY, (start_date, end_date))
+            cursor.executemany(APPROACH_INSERT_QUERY, [
+                (d['neo_reference_id'], d['close_approach_date'], d['relative_velocity_kmph'], d['astronomical'], d['miss_distance_km'], d['miss_distance_lunar'], d['orbiting_body'],
+                 d['estimated_diameter_mean_km'], d['velocity_kms'], d['kinetic_energy_mt'], d['approach_risk_score'])
+                for d in records
+            ])
+            cursor.execute(CUBE_DELETE_QUERY, (start_date, end_date))
+            cursor.execute(CUBE_INSERT_QUERY, (start_date, end_date))
+            conn.commit()
+        except Exception:
+            # Any failure (including a bad record while building the parameters) must not leave
+            # this thread's connection mid-transaction, or the next window would commit it
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+
+class IngestService:
+    """
+    Runs the scheduler and the worker threads.
+
+    `loader` needs a `load_window(start_date, end_date, records)` method
+    (MySQLWindowLoader in production).
+    """
+
+    def __init__(self, queue, loader, workers=4, base_url=NEOWS_BASE_URL, api_key=API_KEY,
+                 rate_limit_per_hour=RATE_LIMIT_PER_HOUR, max_attempts=MAX_ATTEMPTS):
+        self.queue = queue
+        self.loader = loader
+        self.workers = workers
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.rate_limiter = RateLimiter(rate_limit_per_hour)
+        self.max_attempts = max_attempts
+        self.stop_event = threading.Event()
+
+    def process_window(self, session, start_date, end_date):
+        """Fetches, transforms and loads one window. Returns the number of approaches loaded."""
+        self.rate_limiter.wait()
+        data = fetch_feed_window(session, start_date, end_date, self.base_url, self.api_key)
+        records = transform_feed(data)
+        self.loader.load_window(start_date, end_date, records)
+        return len(records)
+
+    def _worker_loop(self, exit_when_drained):
+        session = requests.Session()
+        while not self.stop_event.is_set():
+            window = self.queue.claim()
+            if window is None:
+                if exit_when_drained and self.queue.is_drained():
+                    return
+                self.stop_event.wait(IDLE_SLEEP_SECONDS)
+                continue
+
+            start_date, end_date, attempts = window
+            try:
+                loaded = self.process_window(session, start_date, end_date)
+            except Exception as err:
+                retry_after = getattr(err, "retry_after", 0.0)
+                status = self.queue.mark_failed(start_date, err, self.max_attempts, retry_after)
+                logger.warning("Window %s..%s failed (attempt %d, now %s): %s", start_date, end_date, attempts + 1, status, err)
+            else:
+                self.queue.mark_done(start_date)
+                logger.info("Window %s..%s loaded: %d approaches", start_date, end_date, loaded)
+
+    def run(self, start_date, end_date=None, once=False, poll_interval=POLL_INTERVAL_SECONDS):
+        """
+        Queues [start_date, end_date or today] and processes it with the workers.
+        With `once`, returns when every window is done or dead; otherwise keeps
+        queueing new days every `poll_interval` seconds until stopped.
+        """
+        recovered = self.queue.recover()
+        if recovered:
+            logger.info("Resuming %d window(s) interrupted by the previous run", recovered)
+
+        threads = [
+            threading.Thread(target=self._worker_loop, args=(once,), name=f"ingest-worker-{i + 1}", daemon=True)
+            for i in range(self.workers)
+        ]
+        self.queue.enqueue_range(start_date, end_date or date.today())
+        for thread in threads:
+            thread.start()
+
+        try:
+            if once:
+                for thread in threads:
+                    while thread.is_alive():
+                        thread.join(timeout=1.0)
+            else:
+                while not self.stop_event.wait(poll_interval):
+                    self.queue.enqueue_range(start_date, end_date or date.today())
+                    logger.info("Queue status: %s", self.queue.status_counts())
+        except KeyboardInterrupt:
+            logger.info("Stopping; running windows will be resumed on the next start")
+        finally:
+            self.stop_event.set()
+            for thread in threads:
+                thread.join()
+
+        return self.queue.status_counts()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scheduled NASA NeoWs ingestion into MySQL.")
+    parser.add_argument("--start-date", type=date.fromisoformat, default=date.today() - timedelta(days=FEED_WINDOW_DAYS),
+                        help="First day to ingest (YYYY-MM-DD).")
+    parser.add_argument("--end-date", type=date.fromisoformat, default=None,
+                        help="Last day to ingest (YYYY-MM-DD). Defaults to today, moving forward while the daemon runs.")
+    parser.add_argument("--workers", type=int, default=4, help="Number of worker threads.")
+    parser.add_argument("--base-url", default=NEOWS_BASE_URL, help="NeoWs base URL (e.g. a local fake server).")
+    parser.add_argument("--api-key", default=API_KEY, help="api.nasa.gov key (default: $NASA_API_KEY or DEMO_KEY).")
+    parser.add_argument("--rate-limit", type=float, default=RATE_LIMIT_PER_HOUR, help="Max requests per hour across all workers (0 = unlimited).")
+    parser.add_argument("--max-attempts", type=int, default=MAX_ATTEMPTS, help="Attempts before a window is marked dead.")
+    parser.add_argument("--queue-path", default=QUEUE_PATH, help="SQLite file holding the work queue.")
+    parser.add_argument("--poll-interval", type=float, default=POLL_INTERVAL_SECONDS, help="Seconds between scheduling new days.")
+    parser.add_argument("--once", action="store_true", help="Process the queue until it is drained, then exit.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(threadName)s %(levelname)s %(message)s")
+
+    loader = MySQLWindowLoader()
+    try:
+        loader.ensure_schema()
+    except mysql.connector.Error as err:
+        logger.error("Error connecting to MySQL: %s", err)
+        raise SystemExit(1)
+
+    queue = FeedWindowQueue(args.queue_path)
+    service = IngestService(
+        queue, loader,
+        workers=args.workers,
+        base_url=args.base_url,
+        api_key=args.api_key,
+        rate_limit_per_hour=args.rate_limit,
+        max_attempts=args.max_attempts
+    )
+    try:
+        counts = service.run(args.start_date, args.end_date, once=args.once, poll_interval=args.poll_interval)
+    finally:
+        queue.close()
+    logger.info("Finished. Queue status: %s", counts)
+    if counts.get("dead"):
+        logger.warning("%d window(s) are dead; inspect feed_windows in %s", counts["dead"], args.queue_path)
+
+
+if __name__ == "__main__":
+    main()
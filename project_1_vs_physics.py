@@ -0,0 +1,127 @@
+from datetime import timedelta
+
+import numpy as np
+
+
+# --- Derived Physics Columns ---
+# Estimates stored with every close approach at ingest time (mean diameter,
+# km/s velocity, kinetic energy, approach risk score), so ranking by risk is an
+# index read instead of per-row math in every query. Used by the ingestion
+# daemon, the ingestion notebook, and the backfill of rows loaded earlier.
+
+ASTEROID_DENSITY_KG_M3 = 2600.0 # Typical stony (S-type) asteroid
+JOULES_PER_MEGATON_TNT = 4.184e15
+RISK_REFERENCE_DISTANCE_KM = 7479893.535 # 0.05 AU, the distance used to flag potentially hazardous asteroids
+DERIVED_BATCH_ROWS = 10000 # Records converted to NumPy arrays per batch
+BACKFILL_BATCH_DAYS = 31 # Days of close_approach updated (and committed) per backfill statement
+
+
+def compute_derived_columns(diameter_min_km, diameter_max_km, velocity_kmph, miss_distance_km):
+    """
+    Vectorized physics estimates for arrays of approaches:
+      * estimated_diameter_mean_km: mean of the min/max diameter estimates;
+      * velocity_kms: relative velocity in km/s;
+      * kinetic_energy_mt: impact energy in megatons of TNT, for a sphere of the
+        max diameter at ASTEROID_DENSITY_KG_M3 moving at the relative velocity;
+      * approach_risk_score: log10 of that energy, minus 2 * log10 of the miss
+        distance in units of 0.05 AU. Like the Palermo scale it is logarithmic:
+        +1 is ten times the energy, and the same energy at a tenth of the
+        distance scores +2.
+    Values that can't be computed (missing inputs, zero energy or distance) are NaN.
+    """
+    diameter_min_km = np.asarray(diameter_min_km, dtype=float)
+    diameter_max_km = np.asarray(diameter_max_km, dtype=float)
+    velocity_kmph = np.asarray(velocity_kmph, dtype=float)
+    miss_distance_km = np.asarray(miss_distance_km, dtype=float)
+
+    radius_m = diameter_max_km * 500.0
+    mass_kg = ASTEROID_DENSITY_KG_M3 * (4.0 / 3.0) * np.pi * radius_m ** 3
+    velocity_ms = velocity_kmph / 3.6
+    kinetic_energy_mt = 0.5 * mass_kg * velocity_ms ** 2 / JOULES_PER_MEGATON_TNT
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        approach_risk_score = np.log10(kinetic_energy_mt) - 2.0 * np.log10(miss_distance_km / RISK_REFERENCE_DISTANCE_KM)
+    approach_risk_score[~np.isfinite(approach_risk_score)] = np.nan
+
+    return {
+        "estimated_diameter_mean_km": (diameter_min_km + diameter_max_km) / 2.0,
+        "velocity_kms": velocity_kmph / 3600.0,
+        "kinetic_energy_mt": kinetic_energy_mt,
+        "approach_risk_score": approach_risk_score,
+    }
+
+
+def add_derived_columns(records, batch_rows=DERIVED_BATCH_ROWS):
+    """
+    Adds the compute_derived_columns fields to each record (the dicts built by
+    transform_feed or the notebook), converting the inputs to NumPy arrays one
+    batch at a time. NaN results are stored as None (SQL NULL). Returns `records`.
+    """
+    for batch_start in range(0, len(records), batch_rows):
+        batch = records[batch_start:batch_start + batch_rows]
+        derived = compute_derived_columns(
+            [np.nan if d['estimated_diameter_min_km'] is None else d['estimated_diameter_min_km'] for d in batch],
+            [np.nan if d['estimated_diameter_max_km'] is None else d['estimated_diameter_max_km'] for d in batch],
+            [d['relative_velocity_kmph'] for d in batch],
+            [d['miss_distance_km'] for d in batch]
+        )
+        # Convert to plain Python floats (None for NaN) for the database driver
+        derived = {
+            column: [None if np.isnan(value) else value for value in values.tolist()]
+            for column, values in derived.items()
+        }
+        for i, d in enumerate(batch):
+            for column, values in derived.items():
+                d[column] = values[i]
+    return records
+
+
+# Same formulas as compute_derived_columns, in SQL with the same constants, for rows
+# already in close_approach. MySQL's LOG10 returns NULL where NumPy gives NaN
+# (zero/negative input), which matches the None that add_derived_columns stores.
+DERIVED_BACKFILL_QUERY = f'''
+UPDATE close_approach AS ca
+LEFT JOIN (SELECT id, MAX(estimated_diameter_min_km) AS diameter_min_km, MAX(estimated_diameter_max_km) AS diameter_max_km
+           FROM asteroids GROUP BY id) AS a ON a.id = ca.neo_reference_id
+SET
+    ca.estimated_diameter_mean_km = (a.diameter_min_km + a.diameter_max_km) / 2,
+    ca.velocity_kms = ca.relative_velocity_kmph / 3600,
+    ca.kinetic_energy_mt = 0.5 * {ASTEROID_DENSITY_KG_M3!r} * 4 / 3 * PI() * POW(a.diameter_max_km * 500, 3)
+                           * POW(ca.relative_velocity_kmph / 3.6, 2) / {JOULES_PER_MEGATON_TNT!r},
+    ca.approach_risk_score = LOG10(0.5 * {ASTEROID_DENSITY_KG_M3!r} * 4 / 3 * PI() * POW(a.diameter_max_km * 500, 3)
+                                   * POW(ca.relative_velocity_kmph / 3.6, 2) / {JOULES_PER_MEGATON_TNT!r})
+                             - 2 * LOG10(ca.miss_distance_km / {RISK_REFERENCE_DISTANCE_KM!r})
+WHERE ca.velocity_kms IS NULL AND {{date_condition}}
+'''
+
+
+def backfill_derived_columns(connection, batch_days=BACKFILL_BATCH_DAYS):
+    """
+    Fills the derived columns of rows loaded before they existed (velocity_kms
+    still NULL), `batch_days` of close_approach_date per statement and commit,
+    so the backfill never holds one huge transaction. Returns the number of rows updated.
+    """
+    cursor = connection.cursor()
+    updated = 0
+    try:
+        cursor.execute('SELECT MIN(close_approach_date), MAX(close_approach_date) FROM close_approach WHERE velocity_kms IS NULL')
+        first_day, last_day = cursor.fetchone()
+        if first_day is not None:
+            batch_query = DERIVED_BACKFILL_QUERY.format(date_condition='ca.close_approach_date BETWEEN %s AND %s')
+            batch_start = first_day
+            while batch_start <= last_day:
+                batch_end = batch_start + timedelta(days=batch_days - 1)
+                cursor.execute(batch_query, (batch_start, batch_end))
+                updated += cursor.rowcount
+                connection.commit()
+                batch_start = batch_end + timedelta(days=1)
+        # Rows without a date can't be batched by date
+        cursor.execute(DERIVED_BACKFILL_QUERY.format(date_condition='ca.close_approach_date IS NULL'))
+        updated += cursor.rowcount
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+    return updated
@@ -0,0 +1,277 @@
+import numpy as np
+import pandas as pd
+
+
+# --- Close Approach Proximity Index ---
+# Answers "which approaches came within X AU / LD (optionally in a date window)"
+# and "k closest approaches (overall or per asteroid)" without scanning or
+# sorting the whole `close_approach` table.
+#
+# Layout: the approach columns are kept as plain NumPy arrays, plus one sorted
+# "view" per distance column (AU and LD, each with its own sort order, so a
+# lunar-distance threshold never relies on the AU order). Each view holds
+#   * every approach with a known distance, in ascending distance order;
+#   * per month, the positions and distances of that month's approaches, in
+#     ascending distance order, precomputed so a date window only slices the
+#     months it covers and only date-checks the first and last month.
+# Per asteroid, approaches are grouped into contiguous, AU-sorted runs.
+# Thresholds are found with binary search (np.searchsorted), so a lookup costs
+# O(log n) per month touched plus the size of the answer.
+#
+# The index is built chunk by chunk and holds only NumPy arrays (about 120 bytes
+# per approach, sorted views included). Asteroid names are looked up once per asteroid, and only for the
+# rows a query returns.
+
+PROXIMITY_INDEX_CHUNK_ROWS = 200000 # Rows read from the database per chunk while building the index
+NAME_LOOKUP_BATCH_IDS = 1000 # Asteroid ids per name lookup query
+
+# Columns expected by ApproachProximityIndex (see PROXIMITY_INDEX_QUERY).
+PROXIMITY_INDEX_COLUMNS = [
+    "neo_reference_id",
+    "is_potentially_hazardous_asteroid",
+    "close_approach_date",
+    "astronomical",
+    "miss_distance_lunar",
+    "orbiting_body",
+]
+
+# One row per approach. Asteroid attributes are collapsed per id first, so a
+# repeated asteroid row does not duplicate its approaches.
+PROXIMITY_INDEX_QUERY = """
+    SELECT
+        ca.neo_reference_id,
+        a.is_potentially_hazardous_asteroid,
+        ca.close_approach_date,
+        ca.astronomical,
+        ca.miss_distance_lunar,
+        ca.orbiting_body
+    FROM
+        close_approach AS ca
+    JOIN
+        (SELECT id, MAX(is_potentially_hazardous_asteroid) AS is_potentially_hazardous_asteroid
+         FROM asteroids
+         GROUP BY id) AS a ON a.id = ca.neo_reference_id
+"""
+
+ASTEROID_NAMES_QUERY = "SELECT id, MAX(name) FROM asteroids WHERE id IN ({id_placeholders}) GROUP BY id"
+
+
+def fetch_asteroid_names(connection, neo_reference_ids, batch_ids=NAME_LOOKUP_BATCH_IDS):
+    """Returns {id: name} for the given asteroid ids, queried `batch_ids` ids at a time."""
+    neo_reference_ids = [int(neo_id) for neo_id in neo_reference_ids]
+    names = {}
+    cursor = connection.cursor()
+    try:
+        for start in range(0, len(neo_reference_ids), batch_ids):
+            batch = neo_reference_ids[start:start + batch_ids]
+            cursor.execute(ASTEROID_NAMES_QUERY.format(id_placeholders=", ".join(["%s"] * len(batch))), batch)
+            names.update(cursor.fetchall())
+    finally:
+        cursor.close()
+    return names
+
+
+class _DistanceView:
+    """Positions of the approaches with a known distance, sorted by that distance, overall and per month."""
+
+    def __init__(self, distances, months):
+        known = np.flatnonzero(~np.isnan(distances))
+
+        self.positions = known[np.argsort(distances[known], kind="stable")]
+        self.distances = distances[self.positions]
+
+        # Sorted by month, then by distance inside the month
+        by_month = known[np.lexsort((distances[known], months[known]))]
+        self.month_keys, month_starts = np.unique(months[by_month], return_index=True)
+        self.month_positions = np.split(by_month, month_starts[1:]) if len(by_month) else []
+        self.month_distances = np.split(distances[by_month], month_starts[1:]) if len(by_month) else []
+
+
+class ApproachProximityIndex:
+    """
+    In-memory, distance-sorted index of close approaches.
+
+    Build it once from a DataFrame with PROXIMITY_INDEX_COLUMNS, or from an
+    iterable of such DataFrames (for example PROXIMITY_INDEX_QUERY read with
+    `chunksize`), and query it with `within`, `closest` and
+    `closest_per_asteroid`. `name_lookup(ids)` returns {id: name} for an array
+    of asteroid ids (see fetch_asteroid_names); without it asteroid_name is
+    empty. All three queries return a DataFrame ordered by ascending
+    miss distance (in LD for `within(max_lunar=...)`, otherwise in AU) with the
+    columns: neo_reference_id, asteroid_name, is_potentially_hazardous_asteroid,
+    close_approach_date, astronomical, miss_distance_lunar, orbiting_body.
+    Approaches with an unknown distance are only left out of searches on that distance.
+    """
+
+    def __init__(self, approaches, name_lookup=None):
+        if isinstance(approaches, pd.DataFrame):
+            approaches = [approaches]
+        self._name_lookup = name_lookup
+
+        # Each chunk is reduced to NumPy arrays right away, so only one chunk is ever held as a DataFrame
+        columns = {"au": [], "lunar": [], "neo_ids": [], "hazardous": [], "dates": [], "bodies": []}
+        body_codes = {}
+        for chunk in approaches:
+            columns["au"].append(chunk["astronomical"].to_numpy(dtype=float))
+            columns["lunar"].append(chunk["miss_distance_lunar"].to_numpy(dtype=float))
+            columns["neo_ids"].append(chunk["neo_reference_id"].to_numpy(dtype=np.int64))
+            columns["hazardous"].append(chunk["is_potentially_hazardous_asteroid"].fillna(False).to_numpy(dtype=bool))
+            columns["dates"].append(pd.to_datetime(chunk["close_approach_date"]).to_numpy().astype("datetime64[D]"))
+            # Orbiting bodies are stored as small integer codes shared by all chunks; -1 means missing
+            chunk_codes, chunk_bodies = pd.factorize(chunk["orbiting_body"])
+            code_map = np.array([body_codes.setdefault(body, len(body_codes)) for body in chunk_bodies] + [-1], dtype=np.int32)
+            columns["bodies"].append(code_map[chunk_codes])
+
+        self._au = _concatenate(columns["au"], float)
+        self._lunar = _concatenate(columns["lunar"], float)
+        self._neo_ids = _concatenate(columns["neo_ids"], np.int64)
+        self._hazardous = _concatenate(columns["hazardous"], bool)
+        self._dates = _concatenate(columns["dates"], "datetime64[D]")
+        self._bodies = _concatenate(columns["bodies"], np.int32)
+        # Code -1 (missing) maps to the trailing None
+        self._body_names = np.array(list(body_codes) + [None], dtype=object)
+
+        months = self._dates.astype("datetime64[M]")
+        self._au_view = _DistanceView(self._au, months)
+        self._lunar_view = _DistanceView(self._lunar, months)
+
+        # Per-asteroid runs: positions grouped by id, each run in ascending AU order
+        known = np.flatnonzero(~np.isnan(self._au))
+        self._neo_order = known[np.lexsort((self._au[known], self._neo_ids[known]))]
+        self._neo_ids_sorted = self._neo_ids[self._neo_order]
+
+    def __len__(self):
+        return len(self._au)
+
+    # --- Queries ---
+
+    def within(self, max_au=None, max_lunar=None, min_au=None, inclusive=True,
+               start_date=None, end_date=None):
+        """
+        Approaches closer than a threshold, given in AU (`max_au`) or lunar
+        distances (`max_lunar`), optionally no closer than `min_au` and inside
+        the [start_date, end_date] window. `inclusive` chooses between <= and <
+        for the upper threshold.
+        """
+        by_lunar = max_lunar is not None
+        view = self._lunar_view if by_lunar else self._au_view
+        threshold = max_lunar if by_lunar else max_au
+        side = "right" if inclusive else "left"
+        # min_au can be binary-searched only in the AU view; the LD view filters it afterwards
+        lower_bound = None if by_lunar else min_au
+
+        def cut(distances):
+            lower = np.searchsorted(distances, lower_bound, side="left") if lower_bound is not None else 0
+            upper = np.searchsorted(distances, threshold, side=side) if threshold is not None else len(distances)
+            return lower, max(lower, upper)
+
+        if start_date is None and end_date is None:
+            lower, upper = cut(view.distances)
+            positions = view.positions[lower:upper]
+        else:
+            parts = []
+            for month_positions, month_distances, is_edge in self._months_in_window(view, start_date, end_date):
+                lower, upper = cut(month_distances)
+                part = month_positions[lower:upper]
+                if is_edge:
+                    part = self._in_date_window(part, start_date, end_date)
+                parts.append(part)
+            positions = self._merge(parts, self._lunar if by_lunar else self._au)
+
+        if by_lunar and min_au is not None:
+            positions = positions[self._au[positions] >= min_au]
+        return self._to_frame(positions)
+
+    def closest(self, k, start_date=None, end_date=None):
+        """The `k` closest approaches (by AU) overall, optionally inside a date window."""
+        view = self._au_view
+        if start_date is None and end_date is None:
+            return self._to_frame(view.positions[:k])
+
+        # Only the k closest of each month can make the top k; only edge months need the date check
+        parts = []
+        for month_positions, _, is_edge in self._months_in_window(view, start_date, end_date):
+            if is_edge:
+                month_positions = self._in_date_window(month_positions, start_date, end_date)
+            parts.append(month_positions[:k])
+        return self._to_frame(self._merge(parts, self._au)[:k])
+
+    def closest_per_asteroid(self, k, neo_reference_ids=None):
+        """
+        The `k` closest approaches (by AU) of each asteroid, or only of the
+        asteroids in `neo_reference_ids`.
+        """
+        if neo_reference_ids is not None:
+            parts = []
+            for neo_id in neo_reference_ids:
+                start = np.searchsorted(self._neo_ids_sorted, neo_id, side="left")
+                stop = np.searchsorted(self._neo_ids_sorted, neo_id, side="right")
+                parts.append(self._neo_order[start:min(stop, start + k)])
+            return self._to_frame(self._merge(parts, self._au))
+
+        # Rank of each approach inside its asteroid's run; keep ranks below k
+        run_starts = np.searchsorted(self._neo_ids_sorted, self._neo_ids_sorted, side="left")
+        ranks = np.arange(len(self._neo_order)) - run_starts
+        return self._to_frame(self._merge([self._neo_order[ranks < k]], self._au))
+
+    # --- Internal Helpers ---
+
+    def _months_in_window(self, view, start_date, end_date):
+        """
+        Yields (positions, distances, is_edge) for each month of `view` that
+        overlaps the date window. Only the first and last month can contain
+        days outside the window; those are flagged with is_edge.
+        """
+        first = 0
+        last = len(view.month_keys)
+        if start_date is not None:
+            first = np.searchsorted(view.month_keys, np.datetime64(start_date, "M"), side="left")
+        if end_date is not None:
+            last = np.searchsorted(view.month_keys, np.datetime64(end_date, "M"), side="right")
+        for i in range(first, last):
+            is_edge = (i == first and start_date is not None) or (i == last - 1 and end_date is not None)
+            yield view.month_positions[i], view.month_distances[i], is_edge
+
+    def _in_date_window(self, positions, start_date, end_date):
+        """Drops positions outside the [start_date, end_date] window."""
+        mask = np.ones(len(positions), dtype=bool)
+        if start_date is not None:
+            mask &= self._dates[positions] >= np.datetime64(start_date, "D")
+        if end_date is not None:
+            mask &= self._dates[positions] <= np.datetime64(end_date, "D")
+        return positions[mask]
+
+    @staticmethod
+    def _merge(parts, distances):
+        """Merges position arrays into one array in ascending order of `distances`."""
+        if not parts:
+            return np.array([], dtype=np.int64)
+        positions = np.concatenate(parts)
+        return positions[np.argsort(distances[positions], kind="stable")]
+
+    def _asteroid_names(self, neo_ids):
+        """Names for `neo_ids`, looked up once per distinct asteroid."""
+        unique_ids = np.unique(neo_ids)
+        if self._name_lookup is None or len(unique_ids) == 0:
+            return np.full(len(neo_ids), None, dtype=object)
+        names = pd.Series(self._name_lookup(unique_ids), dtype=object)
+        return names.reindex(neo_ids).to_numpy()
+
+    def _to_frame(self, positions):
+        neo_ids = self._neo_ids[positions]
+        return pd.DataFrame({
+            "neo_reference_id": neo_ids,
+            "asteroid_name": self._asteroid_names(neo_ids),
+            "is_potentially_hazardous_asteroid": self._hazardous[positions],
+            "close_approach_date": self._dates[positions],
+            "astronomical": self._au[positions],
+            "miss_distance_lunar": self._lunar[positions],
+            "orbiting_body": self._body_names[self._bodies[positions]],
+        })
+
+
+def _concatenate(arrays, dtype):
+    """Concatenates the per-chunk arrays (an empty array of `dtype` when there are none)."""
+    if not arrays:
+        return np.array([], dtype=dtype)
+    return np.concatenate(arrays).astype(dtype, copy=False)
@@ -3,6 +3,8 @@ import pandas as pd
 import mysql.connector
 from datetime import date 
 from streamlit_option_menu import option_menu # Make sure you have this installed: pip install streamlit-option-menu
+from project_1_vs_proximity import ApproachProximityIndex, PROXIMITY_INDEX_QUERY, PROXIMITY_INDEX_CHUNK_ROWS, fetch_asteroid_names
+from project_1_vs_export import export_query, EXPORT_URL_PATH, ExportTooLargeError
 
 
 # --- MySQL Database Connection Details ---
@@ -12,6 +14,10 @@ DB_USER = "vikram"  # e.g., "root"
 DB_PASSWORD = "Vikram" # Your MySQL user's password
 DB_NAME = "project_1" # The name of your database
 
+# Rows shown in the "Matching Asteroid Details" table. The full result can be
+# exported from the page instead of being loaded into the app.
+DETAILS_PREVIEW_ROWS = 10000
+
 # --- SQL Queries ---
 # This dictionary holds all your queries, organized by a descriptive title.
 QUERIES = {
@@ -96,10 +102,12 @@ QUERIES = {
     """,
     "5. Find the month with the most asteroid approaches": """
         SELECT
-            DATE_FORMAT(close_approach_date, '%Y-%m') AS approach_month,
-            COUNT(neo_reference_id) AS approaches_count
+            DATE_FORMAT(ca.close_approach_date, '%Y-%m') AS approach_month,
+            COUNT(ca.neo_reference_id) AS approaches_count
         FROM
-            close_approach
+            close_approach AS ca
+        JOIN
+            asteroids AS a ON a.id = ca.neo_reference_id
         GROUP BY
             approach_month
         ORDER BY
@@ -175,10 +183,12 @@ QUERIES = {
     """,
     "11. Count how many approaches happened per month": """
         SELECT
-            DATE_FORMAT(close_approach_date, '%Y-%m') AS approach_month,
-            COUNT(neo_reference_id) AS approaches_count
+            DATE_FORMAT(ca.close_approach_date, '%Y-%m') AS approach_month,
+            COUNT(ca.neo_reference_id) AS approaches_count
         FROM
-            close_approach
+            close_approach AS ca
+        JOIN
+            asteroids AS a ON a.id = ca.neo_reference_id
         GROUP BY
             approach_month
         ORDER BY
@@ -252,7 +262,8 @@ QUERIES = {
         JOIN
             close_approach AS ca ON a.id = ca.neo_reference_id
         WHERE
-            YEAR(ca.close_approach_date) = 2024;
+            ca.close_approach_date >= '2024-01-01'
+            AND ca.close_approach_date < '2025-01-01'
     """,
     "18. List asteroids that are NOT potentially hazardous but have a very close approach distance (e.g., less than 0.001 AU)": """
         SELECT DISTINCT
@@ -299,9 +310,130 @@ QUERIES = {
             velocity_range
         ORDER BY
             MIN(relative_velocity_kmph);
+    """,
+    "21. Count how many approaches happened per year": """
+        SELECT
+            YEAR(ca.close_approach_date) AS approach_year,
+            COUNT(ca.neo_reference_id) AS approaches_count
+        FROM
+            close_approach AS ca
+        JOIN
+            asteroids AS a ON a.id = ca.neo_reference_id
+        GROUP BY
+            approach_year
+        ORDER BY
+            approach_year;
+    """,
+    "22. Top 10 riskiest approaches (kinetic energy vs. miss distance risk score)": """
+        SELECT
+            a.name AS asteroid_name,
+            ca.close_approach_date,
+            ca.approach_risk_score,
+            ca.kinetic_energy_mt,
+            ca.estimated_diameter_mean_km,
+            ca.velocity_kms,
+            ca.miss_distance_km
+        FROM
+            asteroids AS a
+        JOIN
+            close_approach AS ca ON a.id = ca.neo_reference_id
+        ORDER BY
+            ca.approach_risk_score DESC -- Precomputed at ingest and indexed, so this reads the top of the index
+        LIMIT 10;
     """
 }
 
+# --- Pre-aggregated Daily Cube ---
+# The ingestion notebook keeps `close_approach_daily` up to date: one row per
+# day x hazardous flag x velocity bucket x orbiting body, holding the approach
+# count, the closest distance (AU) and the fastest velocity of that cell.
+# Time-series queries roll the cube up to month/year instead of scanning and
+# formatting every row of `close_approach`.
+CUBE_TABLE = "close_approach_daily"
+CUBE_VELOCITY_BUCKET_KMPH = 1000 # Same as the velocity slider step, so slider bounds map onto whole buckets
+
+# Cube versions of the time-series queries above (same titles, same output columns).
+# They are used whenever the active filters can be answered from the cube alone.
+CUBE_QUERIES = {
+    "5. Find the month with the most asteroid approaches": """
+        SELECT
+            DATE_FORMAT(approach_day, '%Y-%m') AS approach_month,
+            SUM(approach_count) AS approaches_count
+        FROM
+            close_approach_daily
+        GROUP BY
+            approach_month
+        ORDER BY
+            approaches_count DESC
+        LIMIT 1;
+    """,
+    "11. Count how many approaches happened per month": """
+        SELECT
+            DATE_FORMAT(approach_day, '%Y-%m') AS approach_month,
+            SUM(approach_count) AS approaches_count
+        FROM
+            close_approach_daily
+        GROUP BY
+            approach_month
+        ORDER BY
+            approach_month;
+    """,
+    "21. Count how many approaches happened per year": """
+        SELECT
+            YEAR(approach_day) AS approach_year,
+            SUM(approach_count) AS approaches_count
+        FROM
+            close_approach_daily
+        GROUP BY
+            approach_year
+        ORDER BY
+            approach_year;
+    """
+}
+
+PROXIMITY_INDEX_TTL_SECONDS = 3600 # The proximity index is rebuilt from the database at most this often
+
+# --- Proximity Index Queries ---
+# The distance-threshold queries above are answered from the in-memory
+# ApproachProximityIndex (see project_1_vs_proximity.py) instead of a range scan.
+# Each entry gives the threshold for `ApproachProximityIndex.within`, a fixed
+# hazardous condition (or None), whether the SQL uses DISTINCT, and how the index
+# columns map to the SQL query's output columns.
+PROXIMITY_QUERIES = {
+    "14. Find asteroids that passed closer than the Moon (lesser than 1 LD), along with their close approach date and distance": {
+        "threshold": {"max_lunar": 1, "inclusive": False},
+        "hazardous": None,
+        "distinct": False,
+        "columns": {
+            "asteroid_name": "asteroid_name",
+            "close_approach_date": "close_approach_date",
+            "miss_distance_lunar": "miss_distance_lunar_distances",
+            "astronomical": "astronomical_units_distance",
+        },
+    },
+    "15. Find asteroids that came within 0.05 AU (astronomical distance)": {
+        "threshold": {"max_au": 0.05, "inclusive": True},
+        "hazardous": None,
+        "distinct": True,
+        "columns": {
+            "asteroid_name": "asteroid_name",
+            "close_approach_date": "close_approach_date",
+            "astronomical": "astronomical",
+        },
+    },
+    "18. List asteroids that are NOT potentially hazardous but have a very close approach distance (e.g., less than 0.001 AU)": {
+        "threshold": {"max_au": 0.001, "inclusive": False},
+        "hazardous": False,
+        "distinct": True,
+        "columns": {
+            "asteroid_name": "asteroid_name",
+            "close_approach_date": "close_approach_date",
+            "astronomical": "astronomical_distance",
+            "is_potentially_hazardous_asteroid": "is_potentially_hazardous_asteroid",
+        },
+    },
+}
+
 # --- Streamlit App Layout ---
 
 st.set_page_config(layout="wide", page_title="Asteroid Data Analysis")
@@ -445,14 +577,206 @@ if conn: # Proceed only if the database connection is successful
         else:
             return "" # Return empty string if no filters are applied
 
+    # --- Helper Function: Build WHERE Clause for the Daily Cube ---
+    # The cube versions must return exactly what the raw queries return, with the
+    # same filters: date, velocity, orbiting body and hazardous are cube dimensions.
+    # The cube has no per-row AU distance and no asteroid name, magnitude or
+    # diameter, so when one of those filters is active this returns None and the
+    # caller falls back to the raw query (which joins `asteroids` for them).
+    def build_cube_where_clause_from_session_state():
+        """
+        Builds a WHERE clause on `close_approach_daily` from the session state
+        filters, or returns None if the filters cannot be applied to the cube.
+        """
+        conditions = []
+
+        min_au, max_au = st.session_state.astronomical_range_filter
+        if min_au > 0.0 or max_au < 1.0:
+            return None
+        if st.session_state.asteroid_name_filter:
+            return None
+        min_mag, max_mag = st.session_state.magnitude_range_filter
+        if min_mag > 0.0 or max_mag < 40.0:
+            return None
+        min_diam, max_diam = st.session_state.diameter_range_filter
+        if min_diam > 0.0 or max_diam < 100.0:
+            return None
+
+        if st.session_state.is_hazardous_filter != "All":
+            hazardous_value = "TRUE" if st.session_state.is_hazardous_filter == "Yes" else "FALSE"
+            conditions.append(f"is_potentially_hazardous_asteroid = {hazardous_value}")
+
+        # Velocity range filter: only exact when both bounds fall on bucket edges
+        min_vel, max_vel = st.session_state.velocity_range_filter
+        if min_vel > 0.0 or max_vel < 200000.0:
+            if min_vel % CUBE_VELOCITY_BUCKET_KMPH or max_vel % CUBE_VELOCITY_BUCKET_KMPH:
+                return None
+            conditions.append(
+                f"velocity_bucket BETWEEN {int(min_vel // CUBE_VELOCITY_BUCKET_KMPH)} AND {int(max_vel // CUBE_VELOCITY_BUCKET_KMPH) - 1}"
+            )
+
+        start_date, end_date = st.session_state.date_range_filter
+        if start_date and end_date and start_date <= end_date:
+            conditions.append(f"approach_day BETWEEN '{start_date.strftime('%Y-%m-%d')}' AND '{end_date.strftime('%Y-%m-%d')}'")
+
+        if st.session_state.selected_orbiting_bodies:
+            quoted_bodies = [f"'{body}'" for body in st.session_state.selected_orbiting_bodies]
+            conditions.append(f"orbiting_body IN ({', '.join(quoted_bodies)})")
+
+        if conditions:
+            return "WHERE " + "\n  AND ".join(conditions)
+        else:
+            return ""
+
+    # --- Streaming Connection ---
+    # Large results (exports, the proximity index build) are streamed from an
+    # unbuffered cursor, which must not block the shared (cached) connection meanwhile.
+    def open_streaming_connection():
+        """Opens a new MySQL connection used to stream a single large result."""
+        return mysql.connector.connect(
+            host=DB_HOST,
+            user=DB_USER,
+            password=DB_PASSWORD,
+            database=DB_NAME
+        )
+
+    # --- Proximity Index ---
+    # Loads every close approach once and keeps them sorted by miss distance, so
+    # threshold and top-k lookups are binary searches instead of table scans.
+    # The index is a snapshot: it is rebuilt after PROXIMITY_INDEX_TTL_SECONDS or
+    # from the "Proximity Search" page, not when the ingester loads new data.
+    @st.cache_resource(ttl=PROXIMITY_INDEX_TTL_SECONDS)
+    def get_proximity_index(_connection):
+        """
+        Builds the ApproachProximityIndex from the database (cached). Approaches are
+        read in chunks on a streaming connection and kept only as NumPy arrays;
+        asteroid names are looked up on `_connection` for the rows a search returns.
+        """
+        try:
+            index_conn = open_streaming_connection()
+            try:
+                chunks = pd.read_sql_query(PROXIMITY_INDEX_QUERY, index_conn, chunksize=PROXIMITY_INDEX_CHUNK_ROWS)
+                return ApproachProximityIndex(chunks, name_lookup=lambda neo_ids: fetch_asteroid_names(_connection, neo_ids))
+            finally:
+                index_conn.close()
+        except Exception as e:
+            st.error(f"Error building the proximity index: {e}")
+            return None
+
+    def get_asteroid_ids_by_name(name_part):
+        """Ids of the asteroids whose name contains `name_part`."""
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT DISTINCT id FROM asteroids WHERE name LIKE %s", (f"%{name_part}%",))
+            return [row[0] for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+
+    def get_date_window_from_session_state():
+        """Returns the (start_date, end_date) filter, or (None, None) if it is not a valid range."""
+        start_date, end_date = st.session_state.date_range_filter
+        if start_date and end_date and start_date <= end_date:
+            return start_date, end_date
+        return None, None
+
+    def run_proximity_query(query_title):
+        """
+        Answers one of the PROXIMITY_QUERIES from the proximity index, applying the
+        session state filters. Returns None when a filter needs the SQL path
+        (name, magnitude, diameter or velocity) or the index is unavailable.
+        """
+        if st.session_state.asteroid_name_filter:
+            return None
+        min_mag, max_mag = st.session_state.magnitude_range_filter
+        if min_mag > 0.0 or max_mag < 40.0:
+            return None
+        min_diam, max_diam = st.session_state.diameter_range_filter
+        if min_diam > 0.0 or max_diam < 100.0:
+            return None
+        min_vel, max_vel = st.session_state.velocity_range_filter
+        if min_vel > 0.0 or max_vel < 200000.0:
+            return None
+
+        proximity_index = get_proximity_index(conn)
+        if proximity_index is None:
+            return None
+
+        spec = PROXIMITY_QUERIES[query_title]
+        start_date, end_date = get_date_window_from_session_state()
+        min_au, max_au = st.session_state.astronomical_range_filter
+
+        df_result = proximity_index.within(
+            min_au=min_au if min_au > 0.0 else None,
+            start_date=start_date,
+            end_date=end_date,
+            **spec["threshold"]
+        )
+
+        # The remaining filters only trim the (already small) result
+        if max_au < 1.0:
+            df_result = df_result[df_result["astronomical"] <= max_au]
+        if spec["hazardous"] is not None:
+            df_result = df_result[df_result["is_potentially_hazardous_asteroid"] == spec["hazardous"]]
+        if st.session_state.is_hazardous_filter != "All":
+            df_result = df_result[df_result["is_potentially_hazardous_asteroid"] == (st.session_state.is_hazardous_filter == "Yes")]
+        if st.session_state.selected_orbiting_bodies:
+            df_result = df_result[df_result["orbiting_body"].isin(st.session_state.selected_orbiting_bodies)]
+
+        df_result = df_result.assign(close_approach_date=df_result["close_approach_date"].dt.date)
+        df_result = df_result[list(spec["columns"])].rename(columns=spec["columns"])
+        if spec["distinct"]:
+            df_result = df_result.drop_duplicates()
+        return df_result.reset_index(drop=True)
+
+    # --- Export Controls ---
+    # Exports run on their own connection (see open_streaming_connection).
+    def render_export_controls(query_to_export, key_prefix):
+        """
+        Shows the export widgets for `query_to_export`. The full result is streamed
+        in chunks to a compressed file on the server and offered as a download link.
+        """
+        with st.expander("Export full result (CSV / Parquet)"):
+            export_col1, export_col2 = st.columns(2)
+            with export_col1:
+                export_format_label = st.selectbox(
+                    "Export Format",
+                    options=["CSV (gzip)", "Parquet"],
+                    key=f"{key_prefix}_export_format_selectbox"
+                )
+            with export_col2:
+                start_export = st.button("Prepare Export", key=f"{key_prefix}_export_button")
+
+            if start_export:
+                export_format = "csv" if export_format_label == "CSV (gzip)" else "parquet"
+                try:
+                    export_conn = open_streaming_connection()
+                    try:
+                        with st.spinner("Streaming rows to the export file..."):
+                            file_names, row_count = export_query(export_conn, query_to_export, export_format, name_prefix=key_prefix)
+                    finally:
+                        export_conn.close()
+                    # Large exports come in parts, each under Streamlit's static file size limit
+                    part_note = f" in {len(file_names)} parts" if len(file_names) > 1 else ""
+                    st.success(f"Exported {row_count:,} rows{part_note}.")
+                    for file_name in file_names:
+                        st.markdown(f'<a href="{EXPORT_URL_PATH}/{file_name}" download="{file_name}">Download {file_name}</a>', unsafe_allow_html=True)
+                except ExportTooLargeError as e:
+                    st.error(f"Export could not be served: {e}")
+                except ImportError:
+                    st.error("Parquet export needs pyarrow. Install it with: pip install pyarrow")
+                except mysql.connector.Error as e:
+                    st.error(f"Error exporting query results: {e}")
+                except Exception as e:
+                    st.error(f"An unexpected error occurred during export: {e}")
+
     # --- Sidebar Navigation ---
     # Uses `streamlit_option_menu` for a cleaner sidebar navigation.
     with st.sidebar:
         st.header("Navigation")
         selected_sidebar_option = option_menu(
             menu_title=None, # No main title for the menu
-            options=["Filter Criteria", "Queries"], # Options to display
-            icons=["funnel", "search"], # Icons for each option
+            options=["Filter Criteria", "Queries", "Proximity Search"], # Options to display
+            icons=["funnel", "search", "bullseye"], # Icons for each option
         )
         st.markdown("---") # Visual separator
         st.info("Data is hypothetical for demonstration purposes.")
@@ -629,10 +953,15 @@ if conn: # Proceed only if the database connection is successful
         st.write("Generated SQL Query for Details Table:") # Indicate which query this is
         st.code(final_details_query, language="sql") 
 
+        render_export_controls(final_details_query, "asteroid_details")
+
         try:
-            df_details = pd.read_sql_query(final_details_query, conn)
+            # Only a preview is loaded here; use the export above for the full result
+            df_details = pd.read_sql_query(f"{final_details_query}\nLIMIT {DETAILS_PREVIEW_ROWS}", conn)
             
             st.info(f"Details table loaded. Shape: {df_details.shape}") # Debugging
+            if len(df_details) == DETAILS_PREVIEW_ROWS:
+                st.caption(f"Showing the first {DETAILS_PREVIEW_ROWS:,} rows. Export the full result above.")
             
             if not df_details.empty:
                 st.dataframe(df_details, use_container_width=True)
@@ -661,8 +990,18 @@ if conn: # Proceed only if the database connection is successful
 
         base_sql_query = QUERIES.get(selected_query_title, "").strip()
 
-        # Build the dynamic WHERE clause, adapting to the selected query's structure
-        dynamic_where_clause_text = build_dynamic_where_clause_from_session_state(base_sql_query)
+        # Time-series queries are answered from the daily cube when the filters allow it
+        cube_where_clause_text = None
+        if selected_query_title in CUBE_QUERIES:
+            cube_where_clause_text = build_cube_where_clause_from_session_state()
+
+        if cube_where_clause_text is not None:
+            base_sql_query = CUBE_QUERIES[selected_query_title].strip()
+            dynamic_where_clause_text = cube_where_clause_text
+            st.caption(f"Served from the pre-aggregated `{CUBE_TABLE}` cube.")
+        else:
+            # Build the dynamic WHERE clause, adapting to the selected query's structure
+            dynamic_where_clause_text = build_dynamic_where_clause_from_session_state(base_sql_query)
 
         final_sql_query = base_sql_query # Start with the base query
 
@@ -727,9 +1066,24 @@ if conn: # Proceed only if the database connection is successful
         # st.code will now display the query with the newlines
         st.code(final_sql_query, language="sql") 
 
+        render_export_controls(final_sql_query, "query_results")
+
+        # Distance-threshold queries are answered from the proximity index when the filters allow it
+        proximity_df = None
+        if selected_query_title in PROXIMITY_QUERIES:
+            proximity_df = run_proximity_query(selected_query_title)
+            if proximity_df is not None:
+                # Not identical to the SQL: the index has one row per approach, while the SQL join
+                # repeats an approach for every duplicate row of the same asteroid in `asteroids`.
+                st.caption(
+                    "Served from the in-memory proximity index: one row per close approach, even where the `asteroids` table holds the same asteroid more than once. "
+                    f"The index is a snapshot rebuilt every {PROXIMITY_INDEX_TTL_SECONDS // 60} minutes, so while new data is being loaded it can miss approaches the SQL query would return "
+                    "(rebuild it on the 'Proximity Search' page)."
+                )
+
         try:
             # Execute the final SQL query and load results into a Pandas DataFrame
-            df = pd.read_sql_query(final_sql_query, conn)
+            df = proximity_df if proximity_df is not None else pd.read_sql_query(final_sql_query, conn)
 
             st.write(f"DataFrame loaded successfully. Shape: {df.shape}")
             if df.empty:
@@ -748,6 +1102,68 @@ if conn: # Proceed only if the database connection is successful
             st.error(f"An unexpected error occurred: {e}")
             st.code(final_sql_query, language="sql") # Show the faulty query again
 
+    elif selected_sidebar_option == "Proximity Search":
+        st.subheader("Close Approach Proximity Search")
+        st.markdown("Find the closest approaches, or every approach within a distance, from the in-memory proximity index. The date range from the 'Filter Criteria' page is applied.")
+        st.caption(f"The index is a snapshot of the database, rebuilt every {PROXIMITY_INDEX_TTL_SECONDS // 60} minutes. Rebuild it to include data loaded since then.")
+        if st.button("Rebuild Proximity Index", key="proximity_rebuild_button"):
+            get_proximity_index.clear()
+
+        proximity_index = get_proximity_index(conn)
+
+        if proximity_index is not None:
+            col1, col2 = st.columns(2)
+
+            with col1:
+                proximity_mode = st.radio(
+                    "Search for",
+                    options=["Approaches within a distance", "k closest approaches", "k closest approaches per asteroid"],
+                    key="proximity_mode_radio"
+                )
+                distance_unit = st.selectbox(
+                    "Distance Unit",
+                    options=["AU", "LD (lunar distances)"],
+                    key="proximity_unit_selectbox"
+                )
+
+            with col2:
+                distance_threshold = st.number_input(
+                    "Maximum Distance",
+                    min_value=0.0, value=0.05,
+                    step=0.001, format="%.4f",
+                    key="proximity_threshold_input"
+                )
+                k_closest = st.number_input(
+                    "k (number of approaches)",
+                    min_value=1, max_value=10000, value=10,
+                    step=1,
+                    key="proximity_k_input"
+                )
+
+            start_date, end_date = get_date_window_from_session_state()
+
+            if proximity_mode == "Approaches within a distance":
+                if distance_unit == "AU":
+                    df_proximity = proximity_index.within(max_au=distance_threshold, start_date=start_date, end_date=end_date)
+                else:
+                    df_proximity = proximity_index.within(max_lunar=distance_threshold, start_date=start_date, end_date=end_date)
+            elif proximity_mode == "k closest approaches":
+                df_proximity = proximity_index.closest(int(k_closest), start_date=start_date, end_date=end_date)
+            else:
+                # Per-asteroid ranking covers each asteroid's whole history (no date window);
+                # the asteroid name filter narrows it down to matching asteroids.
+                if st.session_state.asteroid_name_filter:
+                    matching_ids = get_asteroid_ids_by_name(st.session_state.asteroid_name_filter)
+                    df_proximity = proximity_index.closest_per_asteroid(int(k_closest), neo_reference_ids=matching_ids)
+                else:
+                    df_proximity = proximity_index.closest_per_asteroid(int(k_closest))
+
+            st.write(f"Approaches found: {len(df_proximity):,} (index holds {len(proximity_index):,} approaches)")
+            if not df_proximity.empty:
+                st.dataframe(df_proximity, use_container_width=True)
+            else:
+                st.info("No approaches found for this search. Try a larger distance or a wider date range.")
+
 else:
     # Message if database connection fails
     st.warning("Could not establish a database connection. Please select an option from the sidebar, and ensure your MySQL server is running and credentials are correct.")
@@ -0,0 +1,147 @@
+import gzip
+import io
+import os
+import sqlite3
+
+import pandas as pd
+import pytest
+from mysql.connector import FieldType
+
+import project_1_vs_export as export
+
+
+# --- Fixtures ---
+
+@pytest.fixture(autouse=True)
+def export_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(export, "EXPORT_DIR", str(tmp_path / "exports"))
+    return tmp_path / "exports"
+
+
+@pytest.fixture
+def approaches():
+    """In-memory table of 2,000 approaches, enough for several small parts."""
+    connection = sqlite3.connect(":memory:")
+    connection.execute("create table close_approach (neo_reference_id integer, orbiting_body text, astronomical real)")
+    connection.executemany(
+        "insert into close_approach values (?, ?, ?)",
+        [(i, f"Body {i % 7}", i / 1000) for i in range(2000)]
+    )
+    yield connection
+    connection.close()
+
+
+class MySQLTypedConnection:
+    """Wraps a sqlite3 connection so its cursors report MySQL column types, like mysql.connector."""
+
+    def __init__(self, connection, type_codes):
+        self._connection = connection
+        self._type_codes = type_codes
+
+    def cursor(self):
+        return MySQLTypedCursor(self._connection.cursor(), self._type_codes)
+
+
+class MySQLTypedCursor:
+    def __init__(self, cursor, type_codes):
+        self._cursor = cursor
+        self._type_codes = type_codes
+
+    @property
+    def description(self):
+        return [(column[0], type_code) + column[2:] for column, type_code in zip(self._cursor.description, self._type_codes)]
+
+    def execute(self, query):
+        self._cursor.execute(query)
+
+    def fetchmany(self, size):
+        return self._cursor.fetchmany(size)
+
+    def close(self):
+        self._cursor.close()
+
+
+def read_csv_part(path):
+    with gzip.open(path, "rt", encoding="utf-8", newline="") as part:
+        return pd.read_csv(io.StringIO(part.read()))
+
+
+# --- Tests ---
+
+def test_csv_export_is_split_into_complete_parts(approaches, export_dir):
+    file_names, row_count = export.export_query(
+        approaches, "SELECT * FROM close_approach ORDER BY neo_reference_id;", "csv",
+        chunk_rows=100, max_part_bytes=2000
+    )
+
+    assert row_count == 2000
+    assert len(file_names) > 1
+    assert file_names == sorted(file_names)
+    assert all(name.endswith(f"_part{i:03d}.csv.gz") for i, name in enumerate(file_names, start=1))
+
+    parts = [read_csv_part(export_dir / name) for name in file_names]
+    # Every part has its own header and only whole chunks
+    assert all(list(part.columns) == ["neo_reference_id", "orbiting_body", "astronomical"] for part in parts)
+    assert all(len(part) % 100 == 0 for part in parts)
+    combined = pd.concat(parts, ignore_index=True)
+    assert combined["neo_reference_id"].tolist() == list(range(2000))
+
+
+def test_parquet_export_is_split_into_complete_parts(approaches, export_dir):
+    file_names, row_count = export.export_query(
+        approaches, "SELECT * FROM close_approach ORDER BY neo_reference_id", "parquet",
+        chunk_rows=200, max_part_bytes=4000
+    )
+
+    assert len(file_names) > 1
+    parts = [pd.read_parquet(export_dir / name) for name in file_names]
+    assert sum(len(part) for part in parts) == row_count == 2000
+    assert pd.concat(parts, ignore_index=True)["neo_reference_id"].tolist() == list(range(2000))
+
+
+@pytest.mark.parametrize("export_format, extension", [("csv", ".csv.gz"), ("parquet", ".parquet")])
+def test_single_part_export_has_no_part_suffix(approaches, export_dir, export_format, extension):
+    file_names, row_count = export.export_query(approaches, "SELECT * FROM close_approach", export_format, name_prefix="details")
+
+    assert row_count == 2000
+    assert len(file_names) == 1
+    assert file_names[0].startswith("details_") and file_names[0].endswith(extension)
+    assert "_part" not in file_names[0]
+    assert os.listdir(export_dir) == file_names
+
+
+def test_part_over_the_static_serving_limit_is_removed(approaches, export_dir, monkeypatch):
+    monkeypatch.setattr(export, "STATIC_SERVING_MAX_BYTES", 1000)
+
+    with pytest.raises(export.ExportTooLargeError):
+        export.export_query(approaches, "SELECT * FROM close_approach", "csv", chunk_rows=500, max_part_bytes=10 ** 6)
+    assert os.listdir(export_dir) == []
+
+
+def test_no_parts_are_left_when_the_writer_fails(approaches, export_dir):
+    # The second chunk can't be cast to the integer type of the first one
+    with pytest.raises(Exception):
+        export.export_query(
+            approaches,
+            "SELECT CASE WHEN neo_reference_id < 1000 THEN neo_reference_id ELSE 'not a number' END AS neo_reference_id FROM close_approach",
+            "parquet", chunk_rows=1000, max_part_bytes=1
+        )
+    assert os.listdir(export_dir) == []
+
+
+def test_parquet_types_come_from_the_cursor_not_the_first_chunk(export_dir):
+    # Regression: a DOUBLE column that is all NULL in the first chunk used to be written as strings
+    connection = sqlite3.connect(":memory:")
+    connection.execute("create table close_approach (neo_reference_id integer, kinetic_energy_mt real)")
+    connection.executemany("insert into close_approach values (?, ?)", [(1, None), (2, None), (3, 1.5), (4, None)])
+    typed_connection = MySQLTypedConnection(connection, [FieldType.LONG, FieldType.DOUBLE])
+
+    file_names, _ = export.export_query(
+        typed_connection, "SELECT * FROM close_approach ORDER BY neo_reference_id", "parquet", chunk_rows=2
+    )
+    connection.close()
+
+    result = pd.read_parquet(export_dir / file_names[0])
+    assert result["kinetic_energy_mt"].dtype == "float64"
+    assert result["kinetic_energy_mt"].iloc[2] == 1.5
+    assert result["kinetic_energy_mt"].isna().tolist() == [True, True, False, True]
@@ -0,0 +1,188 @@
+import json
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+import project_1_vs_ingest_daemon as daemon
+
+
+# --- Fake NeoWs Server ---
+
+def make_feed(start_date, end_date):
+    """A feed response with one approach per day, shaped like the real NeoWs feed."""
+    near_earth_objects = {}
+    day = start_date
+    while day <= end_date:
+        near_earth_objects[day.isoformat()] = [{
+            "id": str(day.toordinal()),
+            "neo_reference_id": str(day.toordinal()),
+            "name": f"({day.isoformat()} FAKE)",
+            "absolute_magnitude_h": 21.5,
+            "estimated_diameter": {"kilometers": {"estimated_diameter_min": 0.1, "estimated_diameter_max": 0.2}},
+            "is_potentially_hazardous_asteroid": False,
+            "close_approach_data": [{
+                "close_approach_date": day.isoformat(),
+                "relative_velocity": {"kilometers_per_hour": "54000.0"},
+                "miss_distance": {"astronomical": "0.02", "lunar": "7.78", "kilometers": "2991957.4"},
+                "orbiting_body": "Earth",
+            }],
+        }]
+        day += timedelta(days=1)
+    return {"element_count": len(near_earth_objects), "near_earth_objects": near_earth_objects}
+
+
+class FakeNeoWs:
+    """
+    Local NeoWs feed server. `failures` maps a window start date (ISO string)
+    to (status, headers) returned instead of the feed for that window.
+    """
+
+    def __init__(self):
+        self.failures = {}
+        self.calls = {}
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                params = parse_qs(urlparse(self.path).query)
+                start = params["start_date"][0]
+                fake.calls[start] = fake.calls.get(start, 0) + 1
+                if start in fake.failures:
+                    status, headers = fake.failures[start]
+                    self.send_response(status)
+                    for name, value in headers.items():
+                        self.send_header(name, value)
+                    self.end_headers()
+                    self.wfile.write(b"fake failure")
+                    return
+                body = json.dumps(make_feed(date.fromisoformat(start), date.fromisoformat(params["end_date"][0]))).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class MemoryLoader:
+    """Stands in for MySQLWindowLoader: keeps the loaded windows in a dict."""
+
+    def __init__(self):
+        self.windows = {}
+        self._lock = threading.Lock()
+
+    def load_window(self, start_date, end_date, records):
+        with self._lock:
+            self.windows[start_date] = records
+
+
+@pytest.fixture
+def neows():
+    fake = FakeNeoWs()
+    yield fake
+    fake.close()
+
+
+@pytest.fixture
+def queue(tmp_path):
+    window_queue = daemon.FeedWindowQueue(str(tmp_path / "queue.sqlite3"))
+    yield window_queue
+    window_queue.close()
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(daemon, "BACKOFF_BASE_SECONDS", 0.01)
+    monkeypatch.setattr(daemon, "IDLE_SLEEP_SECONDS", 0.01)
+
+
+def make_service(queue, neows, loader, **kwargs):
+    return daemon.IngestService(queue, loader, base_url=neows.base_url, rate_limit_per_hour=0, **kwargs)
+
+
+def window_row(queue, start_date):
+    return queue._db.execute(
+        "select status, attempts, next_attempt_at, last_error from feed_windows where start_date = ?",
+        (start_date,)
+    ).fetchone()
+
+
+# --- Tests ---
+
+def test_windows_reach_done(queue, neows):
+    loader = MemoryLoader()
+    counts = make_service(queue, neows, loader, workers=4).run(date(2024, 1, 1), date(2024, 2, 29), once=True)
+
+    assert counts == {"done": 9}
+    assert len(loader.windows) == 9
+    assert sum(len(records) for records in loader.windows.values()) == 60
+    record = loader.windows[date(2024, 1, 1)][0]
+    assert record["relative_velocity_kmph"] == 54000.0
+    assert record["velocity_kms"] == pytest.approx(15.0)
+
+
+def test_failing_window_goes_dead_after_max_attempts(queue, neows):
+    neows.failures["2024-01-08"] = (500, {})
+    loader = MemoryLoader()
+    counts = make_service(queue, neows, loader, workers=2, max_attempts=3).run(date(2024, 1, 1), date(2024, 1, 21), once=True)
+
+    assert counts == {"done": 2, "dead": 1}
+    status, attempts, _, last_error = window_row(queue, "2024-01-08")
+    assert (status, attempts) == ("dead", 3)
+    assert "HTTP 500" in last_error
+    assert neows.calls["2024-01-08"] == 3
+    assert date(2024, 1, 8) not in loader.windows
+
+
+def test_rate_limited_window_waits_for_retry_after(queue, neows):
+    neows.failures["2024-01-01"] = (429, {"Retry-After": "120"})
+    service = make_service(queue, neows, MemoryLoader(), workers=1)
+    runner = threading.Thread(target=service.run, args=(date(2024, 1, 1), date(2024, 1, 7)), kwargs={"once": True})
+    runner.start()
+    try:
+        # Wait until run() has queued the window and the first attempt has failed
+        deadline = time.time() + 10
+        while time.time() < deadline and (window_row(queue, "2024-01-01") or (None, 0))[1] == 0:
+            time.sleep(0.01)
+    finally:
+        service.stop_event.set()
+        runner.join()
+
+    status, attempts, next_attempt_at, last_error = window_row(queue, "2024-01-01")
+    assert (status, attempts) == ("pending", 1)
+    assert "HTTP 429" in last_error
+    assert next_attempt_at - time.time() > 100
+    assert neows.calls["2024-01-01"] == 1
+
+
+def test_recover_requeues_running_windows(queue, neows, tmp_path):
+    queue.enqueue_range(date(2024, 1, 1), date(2024, 1, 14))
+    claimed = queue.claim()
+    assert claimed == (date(2024, 1, 1), date(2024, 1, 7), 0)
+    assert window_row(queue, "2024-01-01")[0] == "running"
+
+    # A new process opening the same queue file after a crash
+    restarted = daemon.FeedWindowQueue(str(tmp_path / "queue.sqlite3"))
+    try:
+        assert restarted.recover() == 1
+        assert window_row(restarted, "2024-01-01")[0] == "pending"
+
+        loader = MemoryLoader()
+        counts = make_service(restarted, neows, loader, workers=2).run(date(2024, 1, 1), date(2024, 1, 14), once=True)
+        assert counts == {"done": 2}
+        assert set(loader.windows) == {date(2024, 1, 1), date(2024, 1, 8)}
+    finally:
+        restarted.close()
@@ -0,0 +1,34 @@
+import math
+
+import numpy as np
+import pytest
+
+from project_1_vs_physics import RISK_REFERENCE_DISTANCE_KM, add_derived_columns, compute_derived_columns
+
+
+def test_compute_derived_columns():
+    derived = compute_derived_columns([0.1], [0.2], [72000.0], [RISK_REFERENCE_DISTANCE_KM / 10])
+
+    assert derived["estimated_diameter_mean_km"][0] == pytest.approx(0.15)
+    assert derived["velocity_kms"][0] == pytest.approx(20.0)
+    # 200 m stony sphere (1.09e10 kg) at 20 km/s
+    mass_kg = 2600.0 * 4 / 3 * math.pi * 100.0 ** 3
+    assert derived["kinetic_energy_mt"][0] == pytest.approx(0.5 * mass_kg * 20000.0 ** 2 / 4.184e15)
+    # A tenth of the reference distance adds 2 to the score
+    assert derived["approach_risk_score"][0] == pytest.approx(math.log10(derived["kinetic_energy_mt"][0]) + 2)
+
+
+def test_add_derived_columns_stores_none_for_missing_values():
+    records = [
+        dict(estimated_diameter_min_km=0.1, estimated_diameter_max_km=0.2, relative_velocity_kmph=36000.0, miss_distance_km=1.0e6),
+        dict(estimated_diameter_min_km=None, estimated_diameter_max_km=None, relative_velocity_kmph=36000.0, miss_distance_km=1.0e6),
+        dict(estimated_diameter_min_km=0.1, estimated_diameter_max_km=0.2, relative_velocity_kmph=36000.0, miss_distance_km=0.0),
+    ]
+    add_derived_columns(records, batch_rows=2)
+
+    assert records[0]["velocity_kms"] == pytest.approx(10.0)
+    assert isinstance(records[0]["approach_risk_score"], float)
+    assert records[1]["velocity_kms"] == pytest.approx(10.0)
+    assert records[1]["kinetic_energy_mt"] is None and records[1]["approach_risk_score"] is None
+    assert records[2]["kinetic_energy_mt"] is not None and records[2]["approach_risk_score"] is None
+    assert not any(isinstance(value, np.floating) for record in records for value in record.values())
@@ -0,0 +1,186 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from project_1_vs_proximity import PROXIMITY_INDEX_COLUMNS, ApproachProximityIndex
+
+
+LUNAR_DISTANCES_PER_AU = 389.17
+
+# Windows that start and/or end in the middle of a month, or lie inside one month
+DATE_WINDOWS = [
+    (None, None),
+    ("2022-03-15", "2022-07-09"),
+    ("2021-01-01", "2021-01-31"),
+    ("2022-05-10", "2022-05-20"),
+    ("2023-02-27", None),
+    (None, "2021-06-03"),
+    ("2030-01-01", "2030-12-31"),
+]
+
+
+# --- Fixtures ---
+
+def make_approaches(rows=5000, seed=7):
+    """Random approaches over three years. The LD order differs from the AU order, and some distances are NaN."""
+    rng = np.random.default_rng(seed)
+    au = rng.uniform(0.0, 0.5, rows)
+    # LD is AU with noise, as if from a separate measurement, so sorting by LD gives a different order
+    lunar = au * LUNAR_DISTANCES_PER_AU * rng.uniform(0.5, 1.5, rows)
+    au[rng.random(rows) < 0.03] = np.nan
+    lunar[rng.random(rows) < 0.03] = np.nan
+    return pd.DataFrame({
+        "neo_reference_id": rng.integers(1000, 1300, rows),
+        "is_potentially_hazardous_asteroid": rng.random(rows) < 0.2,
+        "close_approach_date": pd.Timestamp("2021-01-01") + pd.to_timedelta(rng.integers(0, 3 * 365, rows), unit="D"),
+        "astronomical": au,
+        "miss_distance_lunar": lunar,
+        "orbiting_body": rng.choice(["Earth", "Mars", "Venus", None], rows),
+    })[PROXIMITY_INDEX_COLUMNS]
+
+
+def asteroid_name(neo_id):
+    return f"({neo_id} TEST)"
+
+
+@pytest.fixture(scope="module")
+def approaches():
+    return make_approaches()
+
+
+@pytest.fixture(scope="module")
+def index(approaches):
+    return ApproachProximityIndex(approaches, name_lookup=lambda ids: {neo_id: asteroid_name(neo_id) for neo_id in ids})
+
+
+# --- Brute-Force Reference ---
+
+def in_window(approaches, start_date, end_date):
+    mask = np.ones(len(approaches), dtype=bool)
+    if start_date is not None:
+        mask &= approaches["close_approach_date"] >= pd.Timestamp(start_date)
+    if end_date is not None:
+        mask &= approaches["close_approach_date"] <= pd.Timestamp(end_date)
+    return mask
+
+
+def rows(frame):
+    """The identifying columns of a result, as a list of tuples in result order (NaN as None, so it compares equal)."""
+    def values(column):
+        return [None if np.isnan(value) else value for value in frame[column].tolist()]
+
+    return list(zip(
+        frame["neo_reference_id"].tolist(),
+        pd.to_datetime(frame["close_approach_date"]).tolist(),
+        values("astronomical"),
+        values("miss_distance_lunar"),
+    ))
+
+
+# --- Tests ---
+
+def test_lunar_order_differs_from_au_order(approaches):
+    both_known = approaches.dropna(subset=["astronomical", "miss_distance_lunar"])
+    assert not both_known.sort_values("miss_distance_lunar")["astronomical"].is_monotonic_increasing
+
+
+@pytest.mark.parametrize("start_date, end_date", DATE_WINDOWS)
+@pytest.mark.parametrize("inclusive", [True, False])
+def test_within_au_matches_brute_force(approaches, index, start_date, end_date, inclusive):
+    # A threshold equal to a stored distance tells <= and < apart
+    threshold = np.nanquantile(approaches["astronomical"], 0.1)
+    below = approaches["astronomical"] <= threshold if inclusive else approaches["astronomical"] < threshold
+    expected = approaches[below & in_window(approaches, start_date, end_date)].sort_values("astronomical", kind="stable")
+
+    result = index.within(max_au=threshold, inclusive=inclusive, start_date=start_date, end_date=end_date)
+
+    assert rows(result) == rows(expected)
+
+
+@pytest.mark.parametrize("start_date, end_date", DATE_WINDOWS)
+def test_within_lunar_matches_brute_force(approaches, index, start_date, end_date):
+    min_au = 0.01
+    mask = (approaches["miss_distance_lunar"] < 20) & (approaches["astronomical"] >= min_au)
+    expected = approaches[mask & in_window(approaches, start_date, end_date)].sort_values("miss_distance_lunar", kind="stable")
+
+    result = index.within(max_lunar=20, min_au=min_au, inclusive=False, start_date=start_date, end_date=end_date)
+
+    assert rows(result) == rows(expected)
+    assert result["miss_distance_lunar"].is_monotonic_increasing
+
+
+@pytest.mark.parametrize("start_date, end_date", DATE_WINDOWS)
+def test_closest_matches_brute_force(approaches, index, start_date, end_date):
+    expected = approaches[in_window(approaches, start_date, end_date)].dropna(subset=["astronomical"])
+    expected = expected.sort_values("astronomical", kind="stable").head(25)
+
+    assert rows(index.closest(25, start_date=start_date, end_date=end_date)) == rows(expected)
+
+
+def test_closest_per_asteroid_matches_brute_force(approaches, index):
+    known = approaches.dropna(subset=["astronomical"]).sort_values("astronomical", kind="stable")
+    expected = known.groupby("neo_reference_id").head(3).sort_values("astronomical", kind="stable")
+    assert rows(index.closest_per_asteroid(3)) == rows(expected)
+
+    some_ids = [1005, 1100, 1299, 999]
+    expected = expected[expected["neo_reference_id"].isin(some_ids)]
+    assert rows(index.closest_per_asteroid(3, neo_reference_ids=some_ids)) == rows(expected)
+
+
+def test_unknown_distances_only_leave_out_searches_on_that_distance(approaches, index):
+    assert len(index) == len(approaches)
+    au_result = index.within(max_au=1.0)
+    lunar_result = index.within(max_lunar=1000.0)
+    assert len(au_result) == approaches["astronomical"].notna().sum()
+    assert len(lunar_result) == approaches["miss_distance_lunar"].notna().sum()
+    # Rows with an unknown AU distance are still found by LD, and keep the NaN
+    assert lunar_result["astronomical"].isna().any()
+
+
+def test_result_columns_and_names(index):
+    result = index.closest(50)
+
+    assert list(result.columns) == [
+        "neo_reference_id", "asteroid_name", "is_potentially_hazardous_asteroid",
+        "close_approach_date", "astronomical", "miss_distance_lunar", "orbiting_body",
+    ]
+    assert result["asteroid_name"].tolist() == [asteroid_name(neo_id) for neo_id in result["neo_reference_id"]]
+    assert set(result["orbiting_body"].dropna()) <= {"Earth", "Mars", "Venus"}
+    assert result["orbiting_body"].isna().any()
+
+
+def test_names_are_looked_up_once_per_returned_asteroid(approaches):
+    lookups = []
+
+    def name_lookup(neo_ids):
+        lookups.append(list(neo_ids))
+        return {neo_id: asteroid_name(neo_id) for neo_id in neo_ids}
+
+    result = ApproachProximityIndex(approaches, name_lookup=name_lookup).closest(200)
+
+    assert len(lookups) == 1
+    assert sorted(lookups[0]) == sorted(set(result["neo_reference_id"]))
+
+
+def test_index_built_from_chunks_matches_single_frame(approaches, index):
+    chunks = [approaches.iloc[start:start + 700] for start in range(0, len(approaches), 700)]
+    chunked = ApproachProximityIndex(iter(chunks))
+
+    assert len(chunked) == len(index)
+    assert rows(chunked.within(max_lunar=30, start_date="2022-03-15", end_date="2022-07-09")) == \
+        rows(index.within(max_lunar=30, start_date="2022-03-15", end_date="2022-07-09"))
+    # Orbiting body codes are shared across chunks
+    pd.testing.assert_series_equal(chunked.closest(100)["orbiting_body"], index.closest(100)["orbiting_body"])
+
+
+@pytest.mark.parametrize("approaches_source", [[], pd.DataFrame(columns=PROXIMITY_INDEX_COLUMNS)], ids=["no chunks", "empty frame"])
+def test_empty_index(approaches_source):
+    empty = ApproachProximityIndex(approaches_source)
+
+    assert len(empty) == 0
+    assert empty.within(max_au=1.0).empty
+    assert empty.within(max_lunar=1.0, start_date="2022-01-15", end_date="2022-02-15").empty
+    assert empty.closest(10).empty
+    assert empty.closest(10, start_date="2022-01-15").empty
+    assert empty.closest_per_asteroid(3).empty
+    assert empty.closest_per_asteroid(3, neo_reference_ids=[1]).empty